@@ -1,4 +1,16 @@
-from . import ai
+import warnings
+
 from . import utility
-from . import audio
-from . import data
+
+try:
+    from . import ai
+except ModuleNotFoundError:
+    warnings.warn("'ai' is disabled")
+try:
+    from . import audio
+except ModuleNotFoundError:
+    warnings.warn("'audio' is disabled")
+try:
+    from . import data
+except ModuleNotFoundError:
+    warnings.warn("'data' is disabled")
@@ -104,7 +104,12 @@ def msg_create_send_receive(
     thread_obj,
     user_prompt: str,
     run_instructions: str = None,
+    rate_limiter=None,
 ):
+    # wait for the request budget (runs read the whole thread, so no token estimate)
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+
     # create message and add to thread
     message = create_message(openai_client, thread_obj, prompt=user_prompt)
 
@@ -160,7 +165,12 @@ def have_conversation(
     conversation_id=None,
     output_processing="print",
     output_dir=None,
+    rate_limiter=None,
 ):
+    """
+    Pass a RateLimiter, or a RequestScheduler client, as 'rate_limiter' to pace the
+    assistant runs together with the other ai calls.
+    """
     if output_dir is not None:
         output_dir_obj = pathlib.Path(output_dir)
 
@@ -210,6 +220,7 @@ def have_conversation(
             thread_obj,
             user_prompt=user_prompt,
             run_instructions=run_instructions,
+            rate_limiter=rate_limiter,
         )
 
         # SAVING CONVERSATION TO .TXT FILE
@@ -1,7 +1,7 @@
 from ..utility.logger import get_logger
 from ..data.various import backup_df
+from ..utility.httpclient import get_session
 
-import requests
 import pandas as pd
 import os, time
 
@@ -10,15 +10,22 @@ class ContentPolicyViolationError(Exception):
     pass
 
 
-from .setup import init_openai_client
+from .setup import init_openai_client, call_openai
 
 client = init_openai_client()
 
 
 # DALL-E 3
-def generate_image(prompt, size="1024x1024", amount=1, ai_model="dall-e-3"):
-    response = client.images.generate(
-        model=ai_model, prompt=prompt, size=size, quality="standard", n=amount
+def generate_image(prompt, size="1024x1024", amount=1, ai_model="dall-e-3", rate_limiter=None):
+    response = call_openai(
+        client.images,
+        "generate",
+        rate_limiter=rate_limiter,
+        model=ai_model,
+        prompt=prompt,
+        size=size,
+        quality="standard",
+        n=amount,
     )
     return response.data[0].url
 
@@ -45,7 +52,7 @@ def generate_image_deprecated(
         "n": number,
         "size": size,
     }
-    response = requests.post(generation_url, headers=headers, json=data)
+    response = get_session().post(generation_url, headers=headers, json=data)
     response_json = response.json()
 
     if response.status_code != 200 or "data" not in response_json:
@@ -71,7 +78,7 @@ def generate_image_deprecated(
 
         local_file_paths = []  # Store the local paths of the images
         for i, image_url in enumerate(image_urls):
-            image_response = requests.get(image_url)
+            image_response = get_session().get(image_url)
             file_path = os.path.join(file_directory, f"{file_name}_{i}{file_extension}")
             with open(file_path, "wb") as f:
                 f.write(image_response.content)
@@ -100,6 +107,7 @@ def dallee_loop_deprecated(
     output_file_name="dallee",
     output_file_extension=".png",
     output_file_directory=None,
+    rate_limiter=None,
 ):
     logger = get_logger()
     # Convert data to a uniform format (list of dictionaries)
@@ -117,7 +125,7 @@ def dallee_loop_deprecated(
             or str(row.get(column_for_output)).strip() == ""
             or str(row.get(column_for_output)).strip().lower() == "nan"
         ):
-            logger.debug(f"Skipping row {i} as it already contains photo")
+            logger.debug("Skipping row %s as it already contains photo", i, extra={"row": i})
             continue
 
         # Concatenate input columns to form the prompt
@@ -127,6 +135,8 @@ def dallee_loop_deprecated(
 
         attempt = 0
         while attempt < 2:
+            if rate_limiter is not None:
+                rate_limiter.acquire()
             try:
                 image_urls_or_filepaths = generate_image(
                     api_key,
@@ -141,11 +151,12 @@ def dallee_loop_deprecated(
             except ContentPolicyViolationError:
                 prompt = arg_content
             finally:
-                time.sleep(1)
+                if rate_limiter is None:
+                    time.sleep(1)
                 attempt += 1
 
         row[column_for_output] = image_urls_or_filepaths[0]
-        logger.info(f"Event: {i + 1} | Index: {i}\n{row[column_for_output]}")
+        logger.info("Event: %s | Index: %s\n%s", i + 1, i, row[column_for_output], extra={"row": i})
 
         backup_file = None
         # Save DataFrame every 100 rows
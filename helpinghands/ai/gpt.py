@@ -2,18 +2,24 @@ from ..utility.logger import get_logger
 from ..data.various import backup_df
 
 # from ..utility.decorator import retry
+from ..utility.decorator import time_execution
 
 import time, os, pandas as pd
 import openai
 
-from .setup import init_openai_client
+from .setup import init_openai_client, call_openai
 
 client = init_openai_client()
 
 
 # updated calling
-def chat(prompt, instructions, model="gpt-3.5-turbo"):
-    response = client.chat.completions.create(
+@time_execution(log_mode=None)
+def chat(prompt, instructions, model="gpt-3.5-turbo", rate_limiter=None):
+    response = call_openai(
+        client.chat.completions,
+        "create",
+        rate_limiter=rate_limiter,
+        tokens=len(instructions + prompt) // 4,  # rough estimate of ~4 characters per token
         model=model,
         messages=[
             {"role": "system", "content": instructions},
@@ -91,7 +97,12 @@ def gpt_loop(
     tolerance_pct=5,
     output_file_name="gpt",
     output_file_directory=None,
+    rate_limiter=None,
 ):
+    """
+    Pass a RateLimiter as 'rate_limiter' to pace the calls by the API budgets
+    instead of the fixed sleeps between calls.
+    """
     logger = get_logger()
     tolerance = tolerance_pct / 100
 
@@ -111,15 +122,22 @@ def gpt_loop(
         best_output_length = float("inf")
 
         while attempts < max_attempts:
+            if rate_limiter is not None:
+                # rough estimate of ~4 characters per token
+                estimate = len(prompt + str(row[column_for_input])) // 4
+                if hasattr(rate_limiter, "clamp_tokens"):
+                    estimate = rate_limiter.clamp_tokens(estimate)
+                rate_limiter.acquire(tokens=estimate)
             api_output = call_gpt(
                 api_key, gpt_model, prompt, row[column_for_input]
             )  # CALL
-            time.sleep(1)
+            if rate_limiter is None:
+                time.sleep(1)
             attempts += 1
 
             # Handle the case when api_output is None
             if api_output is None or api_output == "":
-                logger.error(f"API output is 'None' at row {i}")
+                logger.error("API output is 'None' at row %s", i, extra={"row": i})
                 break
 
             if abs(len(api_output) - char_max) < abs(best_output_length - char_max):
@@ -134,16 +152,23 @@ def gpt_loop(
                 break
 
             logger.debug(
-                f"Output length not within limits {round(char_min * (1 - tolerance))} and {round(char_max * (1 + tolerance))} with {len(api_output)} characters at row {i}. Trying again with attempt {attempts}..."
+                "Output length not within limits %s and %s with %s characters at row %s. Trying again with attempt %s...",
+                round(char_min * (1 - tolerance)),
+                round(char_max * (1 + tolerance)),
+                len(api_output),
+                i,
+                attempts,
+                extra={"row": i},
             )
-            time.sleep(0.5)
+            if rate_limiter is None:
+                time.sleep(0.5)
 
         if to_remove is not None:
             for string in to_remove:
                 best_output = best_output.replace(string, "")
 
         row[column_for_output] = best_output
-        logger.info(f"Entry: {i + 1} | Index: {i}\n{row[column_for_output]}")
+        logger.info("Entry: %s | Index: %s\n%s", i + 1, i, row[column_for_output], extra={"row": i})
 
         # Save DataFrame every 100 rows
         if output_file_directory is not None:
@@ -14,3 +14,20 @@ def init_openai_client(raw_api_key=None, dotenv_key=None):
     )
 
     return OpenAI(api_key=api_key)
+
+
+def call_openai(resource, method, rate_limiter=None, tokens=0, **kwargs):
+    """
+    Calls 'method' on an OpenAI client resource (e.g. client.chat.completions, "create").
+
+    With a rate_limiter the call waits for the budget first and, if the limiter is
+    adaptive, feeds the x-ratelimit-* response headers back into it.
+    """
+    if rate_limiter is None:
+        return getattr(resource, method)(**kwargs)
+
+    rate_limiter.acquire(tokens=tokens)
+    raw_response = getattr(resource.with_raw_response, method)(**kwargs)
+    if hasattr(rate_limiter, "update_from_headers"):
+        rate_limiter.update_from_headers(raw_response.headers)
+    return raw_response.parse()
@@ -5,16 +5,18 @@ from dotenv import load_dotenv
 
 import os, pathlib, random
 
-from .setup import init_openai_client
+from .setup import init_openai_client, call_openai
 
 client = init_openai_client()
 
 
 def openai_tts(
-    input_text, output_file_path="./oa-tts_output.mp3", model="tts-1", voice="alloy"
+    input_text, output_file_path="./oa-tts_output.mp3", model="tts-1", voice="alloy", rate_limiter=None
 ):
     # processing
-    response = client.audio.speech.create(model=model, voice=voice, input=input_text)
+    response = call_openai(
+        client.audio.speech, "create", rate_limiter=rate_limiter, model=model, voice=voice, input=input_text
+    )
 
     # saving
     response.stream_to_file(output_file_path)
@@ -2,12 +2,14 @@ from ..utility.logger import get_logger
 from ..utility.helper import log_exception
 from ..data.various import backup_df
 from ..data.image import get_image, get_image_res
-from ..utility.decorator import time_execution
+from ..utility.decorator import time_execution, profile_execution
+from ..utility.cache import cached
+from ..utility.httpclient import cached_get
 
 from super_image import ImageLoader
 from super_image import DrlnModel, MsrnModel, EdsrModel
 from PIL import Image
-import requests
+from io import BytesIO
 import gc
 
 import time
@@ -15,6 +17,7 @@ import time
 import os
 
 
+@cached(disk=False, max_entries=2)  # keeps the models in memory only
 def load_model(model_name: str, scale: int = 2):
     model_path = f"eugenesiow/{model_name}"
 
@@ -30,6 +33,7 @@ def load_model(model_name: str, scale: int = 2):
         )
 
 
+@time_execution(log_mode=None)
 def super_image(
     input_file: str,
     scale: int = 2,
@@ -73,8 +77,10 @@ def super_image(
 
     try:
         if input_file.startswith("http"):
-            image = Image.open(requests.get(input_file, stream=True).raw)
-            time.sleep(wait_time)
+            response = cached_get(input_file)
+            image = Image.open(BytesIO(response.content))
+            if not response.from_cache:
+                time.sleep(wait_time)
         else:
             image = Image.open(input_file)
 
@@ -108,6 +114,7 @@ def super_image(
 
 
 @time_execution(2, "minutes")
+@profile_execution()
 def super_image_loop(
     data,
     input_column,
@@ -147,7 +154,11 @@ def super_image_loop(
         data.at[i, input_column] = upscaled_file if upscaled_file else input_file
 
         logger.info(
-            f"Row:{i} - {'Upscaled' if upscaled_file else 'Did not upscale'} image:\n{input_file}"
+            "Row:%s - %s image:\n%s",
+            i,
+            "Upscaled" if upscaled_file else "Did not upscale",
+            input_file,
+            extra={"row": i},
         )
         if sleep:
             time.sleep(sleep)
@@ -4,7 +4,7 @@ from ..ai.gpt import chat
 from ..ai.dalle import generate_image
 from ..data.image import image_to_base64str
 
-from .setup import init_openai_client
+from .setup import init_openai_client, call_openai
 
 client = init_openai_client()
 
@@ -12,7 +12,7 @@ client = init_openai_client()
 # https://platform.openai.com/docs/guides/vision
 
 
-def view_image(images_in_base64str: list, prompt, max_tokens=300):
+def view_image(images_in_base64str: list, prompt, max_tokens=300, rate_limiter=None):
     messages = [
         {
             "role": "user",
@@ -30,7 +30,11 @@ def view_image(images_in_base64str: list, prompt, max_tokens=300):
             },
         )
 
-    response = client.chat.completions.create(
+    response = call_openai(
+        client.chat.completions,
+        "create",
+        rate_limiter=rate_limiter,
+        tokens=max_tokens,
         model="gpt-4-vision-preview",
         messages=messages,
         max_tokens=max_tokens,
@@ -5,13 +5,15 @@ import requests, time
 import openai
 
 
-def call_whisper(api_key, mp3_path, action="transcribe"):
+def call_whisper(api_key, mp3_path, action="transcribe", rate_limiter=None):
     """
     Could need some love regarding other whisper functions
     and the opening of any kind of path format or taking a
     prompt as specified in the OpenAI API docs:
     https://platform.openai.com/docs/guides/speech-to-text/longer-inputs
 
+    The legacy openai.Audio interface does not expose the response headers,
+    so a rate_limiter only paces the calls here and is not adapted.
     """
     logger = get_logger()
     openai.api_key = api_key
@@ -20,6 +22,8 @@ def call_whisper(api_key, mp3_path, action="transcribe"):
         attempts = 0
         while attempts < 5:
             try:
+                if rate_limiter is not None:
+                    rate_limiter.acquire()
                 with open(rf"{mp3_path}", "rb") as audio_file:
                     api_result = openai.Audio.transcribe("whisper-1", audio_file)["text"]
                 if api_result is not None:
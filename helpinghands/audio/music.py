@@ -4,6 +4,7 @@ from scipy.io.wavfile import write
 import random, pathlib
 
 from ..data.various import choose_random_file
+from ..utility.decorator import time_execution, profile_execution
 from ..audio.processing import (
     bpm_match_two_files,
     play_sound,
@@ -120,6 +121,7 @@ def note_to_freq(note):
     return frequency
 
 
+@time_execution(log_mode=None)
 def generate_track(pattern, bpm, song_length, sample_rate, track_type="melody"):
     """
     Generates a track (either drum or melody) based on a given pattern and BPM.
@@ -177,6 +179,7 @@ def mix_tracks(drum_track, melody_track):
 
 
 # re-usable implementation
+@profile_execution()
 def generate_music(
     drum_patterns=None,  # List of drum patterns
     melody_sequences=None,  # List of melody sequences
@@ -4,6 +4,8 @@ import pygame  # playing
 
 import os
 
+from ..utility.cache import cached
+
 
 pygame.mixer.init()
 
@@ -23,6 +25,7 @@ def play_sound(file_path, volume=1.0, wait_to_finish=False):
 
 
 # tempo matching of voice and beat
+@cached()
 def get_tempo(file_path):
     y, sr = librosa.load(file_path)
     onset_env = librosa.onset.onset_strength(y=y, sr=sr)
@@ -68,6 +71,7 @@ def bpm_match_two_files(file_path_one, file_path_two, output_dir, tempo=120):
     return adj_path_one, adj_path_two
 
 
+@cached()
 def get_audio_length(file_path):
     audio = AudioSegment.from_file(file_path)
     duration = len(audio) / 1000  # pydub calculates in millisec
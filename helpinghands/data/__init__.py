@@ -26,5 +26,6 @@ from .image import (
     bytes_to_base64,
     image_to_base64str,
     get_file_size,
+    get_remote_file_size,
     compress_image,
 )
@@ -1,8 +1,10 @@
 from ..utility.logger import get_logger
 from ..utility.helper import log_exception
-from ..utility.decorator import retry
+from ..utility.decorator import retry, time_execution, profile_execution
+from ..utility.cache import cached
+from ..utility.httpclient import get_session, cached_get
 
-import os, requests
+import os
 import uuid
 from urllib.parse import urlparse
 from base64 import b64decode
@@ -30,6 +32,7 @@ def get_image_res(image_obj):
     return width, height
 
 
+@time_execution(log_mode=None)
 @retry((ConnectionError, Timeout, UnidentifiedImageError), "simple")
 def get_image(source):
     """
@@ -42,7 +45,7 @@ def get_image(source):
         img_obj = Image.open(BytesIO(source))
         img_format = img_obj.format
     elif bool(urlparse(source).netloc):
-        response = requests.get(source)
+        response = cached_get(source)
         img_obj = Image.open(BytesIO(response.content))
         img_format = img_obj.format
     elif source.startswith("data:image"):
@@ -95,10 +98,11 @@ def image_to_base64str(image_source, file_type="JPEG"):
     return base64_string
 
 
+@cached(ttl=24 * 3600)
 def image_to_base64str(image_source, file_type="JPEG"):
     if "http" in image_source or "https" in image_source:
         # Handle URL
-        response = requests.get(image_source)
+        response = cached_get(image_source)
         if response.status_code == 200:
             image_data = BytesIO(response.content)
         else:
@@ -164,14 +168,19 @@ def get_file_size(source, unit="KB"):
     elif os.path.exists(source):
         size = os.path.getsize(source)
     elif bool(urlparse(source).netloc):
-        response = requests.head(source)
-        if "content-length" in response.headers:
-            size = int(response.headers.get("content-length", 0))
-        else:
-            return 0  # content-length header not available
+        size = get_remote_file_size(source)
     return convert_byte_sizes(size, unit)
 
 
+@cached(ttl=24 * 3600)
+def get_remote_file_size(url):
+    """Returns the content-length of url in bytes or 0 if the header is not available."""
+    response = get_session().head(url, allow_redirects=True)
+    return int(response.headers.get("content-length", 0))
+
+
+@time_execution(log_mode=None)
+@profile_execution()
 def compress_image(source, output_dir=None, quality=80, unit="KB"):
     logger = get_logger()
 
@@ -1,8 +1,39 @@
-from .settings import load_settings
-from .logger import config_logger, LOGGER_NAME
-from .tokenbucket import TokenBucket, api_rate_limit_wait
+from .settings import load_settings, Settings, get_settings
+from .logger import (
+    config_logger,
+    stop_logging,
+    log_context,
+    JsonFormatter,
+    RateLimitFilter,
+    DeduplicateFilter,
+    SamplingFilter,
+    LOGGER_NAME,
+)
+from .tokenbucket import (
+    TokenBucket,
+    SharedTokenBucket,
+    RateLimiter,
+    AdaptiveRateLimiter,
+    api_rate_limit_wait,
+)
+from .scheduler import RequestScheduler, PRIORITIES
 
-from .decorator import retry, time_execution
+from .cache import cached, get_cache_dir
+from .httpclient import get_session, configure_http, close_sessions, cached_get, clear_http_cache
+from .sampler import ResourceSampler
+from .proxypool import ProxyPool, ProxyEndpoint, ProxyBannedError, ProxyFailureError
+from .metrics import MetricsRegistry, LatencyHistogram, get_registry
+
+from .decorator import (
+    retry,
+    get_retry_after,
+    circuit_breaker,
+    get_circuit,
+    CircuitBreaker,
+    CircuitOpenError,
+    time_execution,
+    profile_execution,
+)
 from .helper import (
     log_exception,
     get_git_tree,
@@ -15,20 +46,32 @@ from .helper import (
 try:
     from .web import (
         WebConfig,
+        BrowserPool,
+        BrowserSession,
+        PageWait,
         open_website,
         setup_browser,
         setup_proxy_wire,
         setup_proxy_simple,
+        setup_capture_wire,
+        setup_proxy_extension,
+        block_urls_cdp,
+        build_request_interceptor,
+        purge_requests,
+        BLOCK_TRACKERS,
         test_proxy,
         listen_on_port,
         get_original_ip,
         get_current_ip,
         rotate_ip,
         make_soup,
+        make_partial_soup,
+        extract,
         connect_to_vpn,
         disconnect_from_vpn,
         check_internet,
     )
+    from .fetcher import fetch_pages, fetch_html_async, needs_javascript
 except ModuleNotFoundError:
     import warnings
 
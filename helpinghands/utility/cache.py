@@ -0,0 +1,200 @@
+from ..utility.logger import get_logger
+
+import functools, hashlib, os, pickle, threading, time
+from collections import OrderedDict
+
+
+def get_cache_dir(*parts) -> str:
+    """Returns (and creates) the cache directory, set via HH_CACHE_DIR or ~/.cache/helpinghands."""
+    base_dir = os.getenv("HH_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "helpinghands")
+    cache_dir = os.path.join(base_dir, *parts)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def cached(
+    ttl=None,
+    max_entries=256,
+    disk=True,
+    cache_dir=None,
+    max_disk_bytes=512 * 1024**2,
+    cache_none=False,
+    key=None,
+):
+    """
+    A memoization decorator keeping results in memory and, with disk=True, pickled on disk
+    so repeated runs over the same inputs skip the recomputation.
+
+    Keys are hashes of the arguments. String arguments pointing to existing files also
+    include the file's mtime and size, so an edited file is computed again. Only None,
+    bools, numbers, strings, paths, bytes and containers of those can be keyed, calls
+    with any other argument (file objects, images, arrays...) skip the cache.
+
+    Parameters:
+        ttl: Seconds a result stays valid. None keeps it until evicted.
+        max_entries: Size of the in-memory LRU.
+        disk: Also store results on disk (results that cannot be pickled stay in memory only).
+        cache_dir: Directory for the disk store. Defaults to a per-function folder in get_cache_dir().
+        max_disk_bytes: Size cap of the disk store, least recently used files are evicted first.
+        cache_none: Also cache None results, which often stand for a failure.
+        key: Optional function receiving the call's arguments and returning the cache key
+            to use instead. It has to return a keyable value, otherwise TypeError is raised.
+
+    The decorated function gets cache_info() with hit/miss counters and cache_clear().
+    """
+
+    def decorator(func):
+        func_id = f"{func.__module__}.{func.__qualname__}"
+        memory = OrderedDict()
+        counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "uncacheable": 0}
+        lock = threading.Lock()
+        disk_dir = None
+
+        def get_disk_dir():
+            nonlocal disk_dir
+            if disk_dir is None:
+                disk_dir = cache_dir or get_cache_dir("cached", func_id)
+                os.makedirs(disk_dir, exist_ok=True)
+            return disk_dir
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            logger = get_logger()
+            try:
+                if key is not None:
+                    fingerprint = _fingerprint(key(*args, **kwargs))
+                else:
+                    fingerprint = (_fingerprint(args), _fingerprint(kwargs))
+            except _Unkeyable as e:
+                if key is not None:
+                    raise TypeError(f"The cache key of {func.__name__} is not keyable: {e}") from None
+                with lock:
+                    counters["uncacheable"] += 1
+                return func(*args, **kwargs)
+            cache_key = hashlib.sha256(repr((func_id, fingerprint)).encode()).hexdigest()
+            now = time.time()
+
+            with lock:
+                entry = memory.get(cache_key)
+                if entry is not None and (entry[0] is None or entry[0] > now):
+                    memory.move_to_end(cache_key)
+                    counters["memory_hits"] += 1
+                    return entry[1]
+
+            if disk:
+                file_path = os.path.join(get_disk_dir(), f"{cache_key}.pkl")
+                try:
+                    with open(file_path, "rb") as f:
+                        expires_at, value = pickle.load(f)
+                    if expires_at is None or expires_at > now:
+                        os.utime(file_path)  # recency for the LRU eviction
+                        with lock:
+                            counters["disk_hits"] += 1
+                            _store(memory, cache_key, (expires_at, value), max_entries)
+                        return value
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.debug(f"Ignoring unreadable cache file {file_path}: {type(e).__name__}: {e}")
+
+            with lock:
+                counters["misses"] += 1
+
+            value = func(*args, **kwargs)
+            if value is None and not cache_none:
+                return value
+
+            entry = (now + ttl if ttl else None, value)
+            with lock:
+                _store(memory, cache_key, entry, max_entries)
+
+            if disk:
+                try:
+                    temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                    with open(temp_path, "wb") as f:
+                        pickle.dump(entry, f)
+                    os.replace(temp_path, file_path)
+                    _evict_disk(get_disk_dir(), max_disk_bytes)
+                except Exception as e:
+                    logger.debug(f"Not caching {func.__name__} result on disk: {type(e).__name__}: {e}")
+
+            return value
+
+        def cache_info():
+            with lock:
+                info = dict(counters)
+                info["memory_entries"] = len(memory)
+            return info
+
+        def cache_clear(disk_too=True):
+            with lock:
+                memory.clear()
+                for name in counters:
+                    counters[name] = 0
+            if disk and disk_too:
+                for name in os.listdir(get_disk_dir()):
+                    if name.endswith(".pkl"):
+                        os.remove(os.path.join(get_disk_dir(), name))
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+class _Unkeyable(Exception):
+    pass
+
+
+def _fingerprint(value):
+    """Stable key material for value, raises _Unkeyable for anything keyed by identity."""
+    if value is None or isinstance(value, (bool, int, float, complex)):
+        return repr(value)
+    if isinstance(value, str):
+        try:
+            if os.path.isfile(value):
+                stat = os.stat(value)
+                return ("file", os.path.abspath(value), stat.st_mtime_ns, stat.st_size)
+        except (OSError, ValueError):
+            pass
+        return value
+    if isinstance(value, os.PathLike):
+        return _fingerprint(os.fspath(value))
+    if isinstance(value, (bytes, bytearray)):
+        return ("bytes", hashlib.sha256(value).hexdigest())
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_fingerprint(item) for item in value))
+    if isinstance(value, (set, frozenset)):
+        return ("set", tuple(sorted(repr(_fingerprint(item)) for item in value)))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((repr(_fingerprint(k)), _fingerprint(v)) for k, v in value.items())))
+    raise _Unkeyable(type(value).__name__)
+
+
+def _store(memory, key, entry, max_entries):
+    memory[key] = entry
+    memory.move_to_end(key)
+    while len(memory) > max_entries:
+        memory.popitem(last=False)
+
+
+def _evict_disk(directory, max_bytes):
+    files = []
+    total = 0
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".pkl"):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    if total <= max_bytes:
+        return
+    for _, size, path in sorted(files):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        if total <= max_bytes:
+            break
@@ -1,15 +1,24 @@
 from ..utility.logger import get_logger
-from ..utility.helper import log_exception
+from ..utility.helper import log_exception, start_tracemalloc, stop_tracemalloc
+from ..utility.metrics import get_registry
 
-import functools, time
+import functools, time, random, asyncio, inspect, threading, itertools, os
+import cProfile, tracemalloc
+from datetime import datetime
+from email.utils import parsedate_to_datetime
 
 
-def retry(exceptions, time_mode: str = "medium"):
+class CircuitOpenError(Exception):
+    """Raised instead of calling the function while its circuit is open."""
+
+
+def retry(exceptions, time_mode: str = "medium", jitter: bool = False, deadline: float = None):
     logger = get_logger()
     """
     A retry decorator that applies a backoff strategy for retries and controls the
     number of retry attempts based on the selected time_mode. It will retry the decorated
-    function upon raising specified exceptions.
+    function upon raising specified exceptions. Works on both regular and async functions,
+    the latter sleep with asyncio instead of blocking the event loop.
 
     The decorator supports four modes represented by a string determining: total tries, initial wait, backoff factor.
 
@@ -20,6 +29,17 @@ def retry(exceptions, time_mode: str = "medium"):
 
         (If no time_mode or an unrecognized time_mode is specified, it defaults to 'medium'.)
 
+    Parameters:
+        jitter: Sleeps a random time between 0 and the backoff wait (full jitter) so that
+            parallel workers do not retry in lockstep. Off by default to keep the fixed waits.
+        deadline: Overall seconds for all attempts including sleeps. No retry is started
+            that would end after the deadline. For coroutines a running attempt is also
+            cancelled at the deadline and raises TimeoutError. For regular functions the
+            deadline only limits the retries, a single slow attempt is not interrupted.
+
+    A Retry-After hint from the exception (a 'retry_after' attribute or the headers of
+    its 'response') is used as the minimum wait.
+
     Returns:
         A decorator which can be used to decorate a function with the retry logic.
 
@@ -48,53 +68,322 @@ def retry(exceptions, time_mode: str = "medium"):
         initial_wait = 2
         backoff_factor = 3
 
+    def next_wait(e, attempt, start_time):
+        """Returns the seconds to sleep before the next attempt or None to give up."""
+        if attempt >= total_tries - 1:
+            logger.warning(f"All retries failed after {attempt} attempts.")
+            return None
+
+        wait_time = initial_wait * backoff_factor**attempt
+        if jitter:
+            wait_time = random.uniform(0, wait_time)
+
+        retry_after = get_retry_after(e)
+        if retry_after is not None:
+            wait_time = max(wait_time, retry_after)
+
+        if deadline is not None and time.monotonic() - start_time + wait_time > deadline:
+            logger.warning(f"Retrying in {round(wait_time, 2)} seconds would exceed the deadline of {deadline} seconds.")
+            return None
+
+        logger.warning(
+            f"{log_exception(e, verbose=False)}\nRetrying attempt {attempt+1} in {round(wait_time, 2)} seconds..."
+        )
+        return wait_time
+
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start_time = time.monotonic()
+                for attempt in range(total_tries):
+                    try:
+                        if deadline is None:
+                            return await func(*args, **kwargs)
+                        remaining = deadline - (time.monotonic() - start_time)
+                        return await asyncio.wait_for(func(*args, **kwargs), remaining)
+                    except CircuitOpenError:
+                        raise  # failing fast is the point of an open circuit
+                    except exceptions as e:
+                        if deadline is not None and time.monotonic() - start_time >= deadline:
+                            logger.warning(f"{func.__name__} ran into the deadline of {deadline} seconds.")
+                            raise
+                        wait_time = next_wait(e, attempt, start_time)
+                        if wait_time is None:
+                            raise
+                        await asyncio.sleep(wait_time)
+
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            wait_time = initial_wait
+            start_time = time.monotonic()
             for attempt in range(total_tries):
                 try:
                     return func(*args, **kwargs)
+                except CircuitOpenError:
+                    raise  # failing fast is the point of an open circuit
                 except exceptions as e:
-                    if attempt >= total_tries - 1:
-                        logger.warning(f"All retries failed after {attempt} attempts.")
+                    wait_time = next_wait(e, attempt, start_time)
+                    if wait_time is None:
                         raise
-                    else:
-                        logger.warning(
-                            f"{log_exception(e, verbose=False)}\nRetrying attempt {attempt+1} in {round(wait_time, 2)} seconds..."
-                        )
-                        time.sleep(wait_time)
-                        wait_time *= backoff_factor
+                    time.sleep(wait_time)
+
+        return wrapper
+
+    return decorator
+
+
+def get_retry_after(e: BaseException):
+    """
+    Reads a Retry-After hint in seconds from an exception, either from a 'retry_after'
+    attribute or from the headers of its 'response' (requests, httpx and openai errors).
+    Returns None if there is no usable hint.
+    """
+    retry_after = getattr(e, "retry_after", None)
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            pass
+
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:  # HTTP-date
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Tracks the failures of one target (endpoint, host, proxy, ...).
+
+        'closed': calls pass, consecutive failures are counted.
+        'open': calls fail fast with CircuitOpenError until recovery_timeout has passed.
+        'half_open': up to half_open_max_calls probe calls pass. A success closes the
+            circuit again, a failure opens it for another recovery_timeout.
+    """
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30, half_open_max_calls=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.failures = 0
+        self.opened_at = None
+        self._state = "closed"
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            self._update_state()
+            return self._state
+
+    def before_call(self) -> bool:
+        """Raises CircuitOpenError if the call may not pass, returns True for a half-open probe."""
+        logger = get_logger()
+        with self._lock:
+            self._update_state()
+            if self._state == "open":
+                raise CircuitOpenError(
+                    f"Circuit '{self.name}' is open. Retrying in {round(self.opened_at + self.recovery_timeout - time.monotonic(), 2)} seconds."
+                )
+            if self._state == "half_open":
+                if self._half_open_calls >= self.half_open_max_calls:
+                    raise CircuitOpenError(f"Circuit '{self.name}' is half-open and already probing.")
+                self._half_open_calls += 1
+                logger.info(f"Circuit '{self.name}' is half-open. Probing...")
+                return True
+            return False
+
+    def release_probe(self):
+        """Frees the slot of a probe that ended without a success or failure being recorded."""
+        with self._lock:
+            if self._state == "half_open" and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_success(self):
+        logger = get_logger()
+        with self._lock:
+            if self._state != "closed":
+                logger.info(f"Circuit '{self.name}' closed again.")
+            self._state = "closed"
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        logger = get_logger()
+        with self._lock:
+            self.failures += 1
+            if self._state == "half_open" or self.failures >= self.failure_threshold:
+                if self._state != "open":
+                    logger.warning(
+                        f"Circuit '{self.name}' opened after {self.failures} failures. Failing fast for {self.recovery_timeout} seconds."
+                    )
+                self._state = "open"
+                self.opened_at = time.monotonic()
+
+    def _update_state(self):
+        if self._state == "open" and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self._state = "half_open"
+            self._half_open_calls = 0
+
+
+CIRCUITS = {}
+_CIRCUITS_LOCK = threading.Lock()
+
+
+def get_circuit(name, **kwargs) -> CircuitBreaker:
+    """Returns the CircuitBreaker registered under name, creating it with kwargs if missing."""
+    with _CIRCUITS_LOCK:
+        if name not in CIRCUITS:
+            CIRCUITS[name] = CircuitBreaker(name, **kwargs)
+        return CIRCUITS[name]
+
+
+def circuit_breaker(exceptions=Exception, failure_threshold=5, recovery_timeout=30, target=None, ignore=()):
+    """
+    A decorator that fails fast with CircuitOpenError once the decorated function kept
+    failing for a target, and probes for recovery after recovery_timeout seconds.
+
+    Parameters:
+        exceptions: The exceptions counted as failures.
+        ignore: Exceptions passed through without counting, even if they match 'exceptions'.
+        target: Name of the circuit, or a function taking the call arguments and returning
+            it (e.g. the host of a url argument). Defaults to module.qualname of the function.
+
+    Combined with @retry, put circuit_breaker below it: retry gives up right away on a
+    CircuitOpenError instead of sleeping through its attempts.
+    """
+
+    def decorator(func):
+        default_name = f"{func.__module__}.{func.__qualname__}"
+
+        def get_target_circuit(args, kwargs):
+            name = target(*args, **kwargs) if callable(target) else target or default_name
+            return get_circuit(
+                name, failure_threshold=failure_threshold, recovery_timeout=recovery_timeout
+            )
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                circuit = get_target_circuit(args, kwargs)
+                probe = circuit.before_call()
+                try:
+                    result = await func(*args, **kwargs)
+                except ignore:
+                    if probe:
+                        circuit.release_probe()
+                    raise
+                except exceptions:
+                    circuit.record_failure()
+                    raise
+                except BaseException:
+                    if probe:
+                        circuit.release_probe()
+                    raise
+                circuit.record_success()
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            circuit = get_target_circuit(args, kwargs)
+            probe = circuit.before_call()
+            try:
+                result = func(*args, **kwargs)
+            except ignore:
+                if probe:
+                    circuit.release_probe()
+                raise
+            except exceptions:
+                circuit.record_failure()
+                raise
+            except BaseException:
+                if probe:
+                    circuit.release_probe()  # neither success nor failure, let the next call probe
+                raise
+            circuit.record_success()
+            return result
 
         return wrapper
 
     return decorator
 
 
-def time_execution(ndigits=3, time_mode="seconds", log_mode="info"):
+def time_execution(ndigits=3, time_mode="seconds", log_mode="info", registry=None):
+    """
+    Times the decorated function with perf_counter_ns and records every call, error and
+    latency in the metrics registry (the global one unless 'registry' is given) under
+    module.qualname of the function.
+
+    Use log_mode=None on hot paths to only record metrics without logging each call.
+    """
+    if registry is None:
+        registry = get_registry()
+
     def decorator(func):
+        metric_name = f"{func.__module__}.{func.__qualname__}"
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             logger = get_logger()
-            logger.info(f"Executing {func.__name__}...")
-            start_time = time.time()
-            result = func(*args, **kwargs)
-            end_time = time.time()
+            if log_mode:
+                logger.info("Executing %s...", func.__name__)
+            start_time = time.perf_counter_ns()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                registry.record(metric_name, time.perf_counter_ns() - start_time, error=True)
+                raise
+            duration_ns = time.perf_counter_ns() - start_time
+            registry.record(metric_name, duration_ns)
+            duration = duration_ns / 1e9
 
-            if log_mode == "info":
+            if log_mode is None:
+                pass
+            elif log_mode == "info":
+                extra = {"latency": duration}
                 if time_mode == "seconds":
-                    logger.info(f"{func.__name__} completed in {round(end_time - start_time, ndigits)} seconds.")
+                    logger.info("%s completed in %s seconds.", func.__name__, round(duration, ndigits), extra=extra)
                 elif time_mode == "minutes":
-                    logger.info(
-                        f"{func.__name__} completed in {round(((end_time - start_time) / 60), ndigits)} minutes."
-                    )
+                    logger.info("%s completed in %s minutes.", func.__name__, round((duration / 60), ndigits), extra=extra)
                 elif time_mode == "hours":
                     logger.info(
-                        f"{func.__name__} completed in {round((((end_time - start_time) / 60) /60), ndigits)} hours."
+                        "%s completed in %s hours.", func.__name__, round(((duration / 60) / 60), ndigits), extra=extra
                     )
                 else:
                     logger.info(
-                        f"{func.__name__} completed in {round(end_time - start_time, ndigits)}s {round(end_time - start_time, ndigits)/60} min {(round(end_time - start_time, ndigits)/60)/60} h."
+                        "%s completed in %ss %s min %s h.",
+                        func.__name__,
+                        round(duration, ndigits),
+                        round(duration, ndigits) / 60,
+                        (round(duration, ndigits) / 60) / 60,
+                        extra=extra,
                     )
             else:
                 logger.warning("No other log_mode than 'info' implemented at this stage. Please select default.")
@@ -104,3 +393,110 @@ def time_execution(ndigits=3, time_mode="seconds", log_mode="info"):
         return wrapper
 
     return decorator
+
+
+_PROFILER_LOCK = threading.Lock()
+
+
+def write_allocation_report(name, before, file_path, top_n):
+    """Dumps the current tracemalloc snapshot and its top_n differences to before."""
+    after = tracemalloc.take_snapshot()
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    after = after.filter_traces(ignored)
+    after.dump(f"{file_path}.snapshot")
+    top_stats = after.compare_to(before.filter_traces(ignored), "lineno")[:top_n]
+    with open(f"{file_path}.txt", "w", encoding="utf-8") as f:
+        f.write("\n".join(str(stat) for stat in top_stats))
+    get_logger().debug(f"Traced allocations of {name} to {file_path}.snapshot")
+
+
+def profile_execution(mode=None, every=None, output_dir=None, top_n=25):
+    """
+    Opt-in companion to time_execution which profiles every Nth call of the decorated
+    function and dumps the result to output_dir. Does nothing unless a mode is set, so
+    it can stay on hot functions in production and be switched on per container.
+
+    The arguments fall back to environment variables, which are read on each call:
+
+        mode / HH_PROFILE: 'cprofile' dumps a .prof file (open with pstats or snakeviz),
+            'tracemalloc' dumps a .snapshot (tracemalloc.Snapshot.load) plus a .txt with
+            the top_n allocation differences of the call.
+        every / HH_PROFILE_EVERY: Profile every Nth call. Defaults to 1.
+        output_dir / HH_PROFILE_DIR: Directory for the dumps. Defaults to 'profiles'.
+
+    To drive it from a settings file pass the values in, e.g.
+    @profile_execution(**settings.get("profiling", {})).
+    """
+
+    def decorator(func):
+        counter = itertools.count(1)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile_mode = mode or os.getenv("HH_PROFILE")
+            if not profile_mode:
+                return func(*args, **kwargs)
+
+            call_number = next(counter)
+            if call_number % int(every or os.getenv("HH_PROFILE_EVERY") or 1):
+                return func(*args, **kwargs)
+
+            logger = get_logger()
+            profile_dir = output_dir or os.getenv("HH_PROFILE_DIR") or "profiles"
+            if not os.path.exists(profile_dir):
+                os.makedirs(profile_dir, exist_ok=True)
+            file_path = os.path.join(
+                profile_dir,
+                f"{func.__name__}_{datetime.now().strftime('%Y%m%d-%H%M%S')}_{call_number}",
+            )
+
+            if profile_mode.lower() == "cprofile":
+                # one profiler at a time, Python 3.12+ refuses concurrent ones
+                if not _PROFILER_LOCK.acquire(blocking=False):
+                    logger.debug(f"Not profiling {func.__name__}, another call is being profiled.")
+                    return func(*args, **kwargs)
+                try:
+                    profiler = cProfile.Profile()
+                    try:
+                        profiler.enable()
+                    except ValueError as e:
+                        logger.debug(f"Not profiling {func.__name__}: {e}")
+                        return func(*args, **kwargs)
+                    try:
+                        return func(*args, **kwargs)
+                    finally:
+                        profiler.disable()
+                        try:
+                            profiler.dump_stats(f"{file_path}.prof")
+                            logger.debug(f"Profiled {func.__name__} to {file_path}.prof")
+                        except Exception as e:
+                            logger.warning(f"Could not write the profile of {func.__name__}: {type(e).__name__}: {e}")
+                finally:
+                    _PROFILER_LOCK.release()
+
+            elif profile_mode.lower() == "tracemalloc":
+                start_tracemalloc(25)
+                try:
+                    before = tracemalloc.take_snapshot()
+                except RuntimeError:  # tracing stopped by code outside start/stop_tracemalloc
+                    before = None
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    try:
+                        if before is not None:
+                            write_allocation_report(func.__name__, before, file_path, top_n)
+                    except Exception as e:
+                        logger.warning(
+                            f"Could not write the allocation report of {func.__name__}: {type(e).__name__}: {e}"
+                        )
+                    finally:
+                        stop_tracemalloc()
+
+            else:
+                logger.warning(f"Unknown profile mode '{profile_mode}'. Choose 'cprofile' or 'tracemalloc'.")
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,133 @@
+from ..utility.logger import get_logger
+from ..utility.web import WebConfig, BrowserPool
+
+import aiohttp
+import asyncio
+import re
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# statuses of bot protection and rate limits a real browser may get past, other errors are final
+BROWSER_FALLBACK_STATUSES = (403, 429, 503)
+
+# typical empty mount points of client-side rendered apps
+_EMPTY_APP_ROOT = re.compile(
+    r'<div[^>]+id=["\'](root|app|__next|__nuxt)["\'][^>]*>\s*</div>', re.IGNORECASE
+)
+_NOSCRIPT_HINT = re.compile(
+    r"<noscript[^>]*>[^<]*(enable|requires?|turn on)[^<]*javascript", re.IGNORECASE
+)
+_NON_CONTENT = re.compile(r"<(script|style|noscript|template)[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def needs_javascript(html: str, min_text_length: int = 200) -> bool:
+    """
+    Default detector guessing whether a page only renders its content with JavaScript:
+    an empty app root, a noscript hint asking to enable JavaScript or hardly any text.
+    """
+    if not html:
+        return True
+    if _EMPTY_APP_ROOT.search(html) or _NOSCRIPT_HINT.search(html):
+        return True
+    text = _TAGS.sub(" ", _NON_CONTENT.sub(" ", html))
+    return len(" ".join(text.split())) < min_text_length
+
+
+async def fetch_html_async(
+    urls,
+    config: WebConfig = WebConfig(),
+    with_proxy: bool = True,
+    concurrency: int = 8,
+    timeout: float = 15,
+    headers: dict = None,
+) -> dict:
+    """
+    Fetches the urls with plain HTTP GETs, at most 'concurrency' at a time, through the
+    proxy of config.proxy_config if set. Returns {url: html} with None for failed or
+    non-200 responses.
+    """
+    responses = await _fetch_responses(urls, config, with_proxy, concurrency, timeout, headers)
+    return {url: html for url, (status, html) in responses.items()}
+
+
+async def _fetch_responses(urls, config, with_proxy, concurrency, timeout, headers) -> dict:
+    # {url: (status, html)} with status None if the request failed and html None unless 200
+    logger = get_logger()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    proxy = proxy_auth = None
+    if with_proxy and config.proxy_config and config.proxy_config.get("host"):
+        proxy = f"http://{config.proxy_config['host']}"
+        if config.proxy_config.get("username"):
+            proxy_auth = aiohttp.BasicAuth(
+                config.proxy_config["username"], config.proxy_config.get("password") or ""
+            )
+
+    async def fetch(session, url):
+        async with semaphore:
+            try:
+                async with session.get(url, proxy=proxy, proxy_auth=proxy_auth) as response:
+                    if response.status != 200:
+                        logger.debug(f"HTTP {response.status} for {url}")
+                        return url, (response.status, None)
+                    return url, (200, await response.text(errors="replace"))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.debug(f"Plain fetch of {url} failed: {type(e).__name__}: {e}")
+                return url, (None, None)
+
+    async with aiohttp.ClientSession(
+        headers=headers or DEFAULT_HEADERS,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        connector=aiohttp.TCPConnector(limit=concurrency),
+    ) as session:
+        results = await asyncio.gather(*(fetch(session, url) for url in urls))
+    return dict(results)
+
+
+def fetch_pages(
+    urls,
+    config: WebConfig = WebConfig(),
+    with_proxy: bool = True,
+    detector=needs_javascript,
+    browser_pool: BrowserPool = None,
+    concurrency: int = 8,
+    timeout: float = 15,
+    headers: dict = None,
+) -> dict:
+    """
+    Returns {url: html} for all urls, trying a plain HTTP GET first and only opening the
+    page in a browser if the request failed, was answered with one of
+    BROWSER_FALLBACK_STATUSES (bot protection, rate limits) or detector(html) says it
+    needs JavaScript. Other error statuses such as 404 or 410 give None.
+
+    The browser fallback uses browser_pool if given, otherwise a temporary BrowserPool.
+    Inside a running event loop (e.g. Jupyter) await fetch_html_async instead.
+    """
+    logger = get_logger()
+    urls = list(urls)
+    responses = asyncio.run(_fetch_responses(urls, config, with_proxy, concurrency, timeout, headers))
+    results = {url: html for url, (status, html) in responses.items()}
+
+    fallback_urls = [
+        url
+        for url in urls
+        if responses[url][0] in (None, *BROWSER_FALLBACK_STATUSES)
+        or (responses[url][0] == 200 and detector(responses[url][1]))
+    ]
+    if fallback_urls:
+        logger.info(f"Opening {len(fallback_urls)} of {len(urls)} pages in a browser.")
+        pool = browser_pool or BrowserPool(config, size=min(2, len(fallback_urls)), with_proxy=with_proxy)
+        try:
+            pages = pool.map(fallback_urls, lambda browser, wait: browser.page_source)
+        finally:
+            if browser_pool is None:
+                pool.close()
+        results.update(zip(fallback_urls, pages))
+
+    return {url: results.get(url) for url in urls}
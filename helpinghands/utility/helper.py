@@ -1,36 +1,100 @@
 from ..utility.logger import get_logger
 
-import sys, time, subprocess, platform, inspect, psutil
+import sys, os, time, subprocess, platform, psutil, logging, threading, tracemalloc
 from termcolor import colored
 
 
+# TRACEMALLOC
+_TRACEMALLOC_LOCK = threading.Lock()
+_TRACEMALLOC_USERS = 0
+_TRACEMALLOC_STARTED = False
+
+
+def start_tracemalloc(frames: int = 1):
+    """
+    Starts tracemalloc for one more user. Calls are reference-counted with stop_tracemalloc
+    so overlapping users (threads, nested phases) never stop tracing under each other.
+    Tracing started elsewhere is left running.
+    """
+    global _TRACEMALLOC_USERS, _TRACEMALLOC_STARTED
+    with _TRACEMALLOC_LOCK:
+        if _TRACEMALLOC_USERS == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            _TRACEMALLOC_STARTED = True
+        _TRACEMALLOC_USERS += 1
+
+
+def stop_tracemalloc():
+    """Releases one start_tracemalloc call and stops tracing after the last one."""
+    global _TRACEMALLOC_USERS, _TRACEMALLOC_STARTED
+    with _TRACEMALLOC_LOCK:
+        _TRACEMALLOC_USERS = max(0, _TRACEMALLOC_USERS - 1)
+        if _TRACEMALLOC_USERS == 0 and _TRACEMALLOC_STARTED:
+            tracemalloc.stop()
+            _TRACEMALLOC_STARTED = False
+
+
 # EXCEPTIONS
-def log_exception(e: BaseException, log_level: str = "warning", verbose=False, tb_limit=4) -> str:
+_LOG_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "exception": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+_RECENT_TRACES = {}
+
+
+def log_exception(
+    e: BaseException, log_level: str = "warning", verbose=False, tb_limit=4, dedupe_seconds=None
+) -> str:
     logger = get_logger()
     """
     Logs an exception with a specified log level.
 
+    The location is read straight from e.__traceback__ and the message is only built
+    if the logger is enabled for the level, so calling it in retry loops stays cheap.
+
     Parameters:
         e: The exception to be logged.
         log_level: The log level for the exception. Defaults to "warning".
+        dedupe_seconds: Skip logging the same exception type raised at the same line
+            again within this many seconds, so failure storms do not flood the logs.
 
     Returns:
         str: The name of the exception type.
     """
+    exception_name = type(e).__name__
 
-    # Get the file name and line number where the exception occurred
-    frames = inspect.trace()
-    outer_frame = frames[-1]
-    outer_file_name = outer_frame.filename
-    outer_line_number = outer_frame.lineno
+    if not logger.isEnabledFor(_LOG_LEVELS.get(log_level, logging.WARNING)):
+        return exception_name
 
-    message = (
-        f"{type(e).__name__} in {outer_file_name}:{outer_line_number}: {str(e).split('  ')[0]}"
-    )
+    # Get the file name and line number where the exception occurred
+    frames = []
+    tb = e.__traceback__
+    while tb is not None:
+        frames.append(tb)
+        tb = tb.tb_next
+    if frames:
+        outer_file_name = frames[-1].tb_frame.f_code.co_filename
+        outer_line_number = frames[-1].tb_lineno
+    else:  # exception that was never raised
+        outer_file_name, outer_line_number = "<unknown>", 0
+
+    if dedupe_seconds:
+        key = (exception_name, outer_file_name, outer_line_number)
+        now = time.monotonic()
+        if now - _RECENT_TRACES.get(key, float("-inf")) < dedupe_seconds:
+            return exception_name
+        if len(_RECENT_TRACES) > 1000:
+            _RECENT_TRACES.clear()
+        _RECENT_TRACES[key] = now
+
+    message = f"{exception_name} in {outer_file_name}:{outer_line_number}: {str(e).split('  ')[0]}"
 
     if verbose:
-        all_frames = [(frame.filename, frame.lineno) for frame in frames]
-        trace = "\n".join([f"File: {file}, Line: {line}" for file, line in all_frames])
+        trace = "\n".join([f"File: {tb.tb_frame.f_code.co_filename}, Line: {tb.tb_lineno}" for tb in frames])
         message += f"\n\n--- Stack Trace ---\n{trace}\n--------------------\n"
 
     log_function = {
@@ -43,31 +107,74 @@ def log_exception(e: BaseException, log_level: str = "warning", verbose=False, t
     }.get(log_level, logger.warning)
 
     log_function(message)
-    return type(e).__name__
+    return exception_name
 
 
 # GITHUB
-def get_git_tree(repo_path="."):
-    def create_tree_string(tree, indent=""):
-        tree_string = ""
-        for name, node in tree.items():
-            tree_string += f"{indent}{name}\n"
-            if isinstance(node, dict):
-                tree_string += create_tree_string(node, indent + "    ")
-        return tree_string
-
-    # Get list of files in repository
-    result = subprocess.run(["git", "ls-files"], capture_output=True, cwd=repo_path, text=True)
-    files = result.stdout.split("\n")
-
-    # Build and print directory tree
+_GIT_TREE_CACHE = {}
+_GIT_INDEX_PATHS = {}
+
+
+def get_git_tree(repo_path=".", max_depth=None, paths=None, use_cache=True) -> str:
+    """
+    Returns the files tracked in a git repository as an indented tree string.
+
+    The NUL-separated output of 'git ls-files -z' is streamed and parsed chunk by chunk,
+    and the result is cached until the repository's index file changes.
+
+    Parameters:
+        max_depth: Only show this many directory levels.
+        paths: Only include files matching these pathspecs (e.g. ["src", "*.py"]).
+        use_cache: Set to False to always call git.
+    """
+    repo_path = os.path.abspath(repo_path)
+    cache_key = (repo_path, max_depth, tuple(paths or ()))
+
+    index_path = _GIT_INDEX_PATHS.get(repo_path)
+    if index_path is None:
+        result = subprocess.run(
+            ["git", "rev-parse", "--git-path", "index"], capture_output=True, cwd=repo_path, text=True
+        )
+        index_path = _GIT_INDEX_PATHS[repo_path] = os.path.join(repo_path, result.stdout.strip())
+    try:
+        index_mtime = os.stat(index_path).st_mtime_ns
+    except OSError:
+        index_mtime = None
+
+    cached = _GIT_TREE_CACHE.get(cache_key)
+    if use_cache and cached and index_mtime is not None and cached[0] == index_mtime:
+        return cached[1]
+
+    # Stream list of files in repository
+    command = ["git", "ls-files", "-z"]
+    if paths:
+        command += ["--", *paths]
     tree = {}
-    for file in files:
-        path = file.split("/")
-        node = tree
-        for part in path:
-            node = node.setdefault(part, {})
-    return create_tree_string(tree)
+    with subprocess.Popen(command, cwd=repo_path, stdout=subprocess.PIPE) as process:
+        remainder = b""
+        for chunk in iter(lambda: process.stdout.read(64 * 1024), b""):
+            *entries, remainder = (remainder + chunk).split(b"\0")
+            for entry in entries:
+                node = tree
+                for part in entry.decode("utf-8", "surrogateescape").split("/")[:max_depth]:
+                    node = node.setdefault(part, {})
+
+    # Render directory tree without recursion
+    lines = []
+    stack = [iter(tree.items())]
+    while stack:
+        for name, node in stack[-1]:
+            lines.append(f"{'    ' * (len(stack) - 1)}{name}")
+            if node:
+                stack.append(iter(node.items()))
+                break
+        else:
+            stack.pop()
+    tree_string = "".join(f"{line}\n" for line in lines)
+
+    if index_mtime is not None:
+        _GIT_TREE_CACHE[cache_key] = (index_mtime, tree_string)
+    return tree_string
 
 
 # OTHER
@@ -89,6 +196,7 @@ def ensure_windows_os():
 
 
 def log_memory_usage(interval=10, stop_event=None):
+    """Logs the memory usage until stop_event is set. See sampler.ResourceSampler for more metrics."""
     logger = get_logger()
 
     current_process = psutil.Process()
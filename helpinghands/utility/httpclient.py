@@ -0,0 +1,325 @@
+from ..utility.logger import get_logger
+from ..utility.cache import get_cache_dir
+
+import hashlib, json, os, re, threading, time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+
+HTTP_CONFIG = {
+    "pool_connections": 10,  # number of hosts with a kept-alive pool
+    "pool_maxsize": 20,  # connections kept per host
+    "retries": 3,
+    "backoff_factor": 0.5,
+    "status_forcelist": (429, 500, 502, 503, 504),
+    "timeout": (5, 30),  # (connect, read) seconds, used when a call passes no timeout
+    "headers": None,
+    "max_sessions": 16,  # proxy setups with a kept-alive session, least recently used closed first
+    "cache": True,  # on-disk response cache of cached_get()
+    "cache_dir": None,  # defaults to get_cache_dir("http")
+    "cache_max_bytes": 1024**3,
+}
+
+_SESSIONS = OrderedDict()
+_SESSIONS_LOCK = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter applying a default timeout to requests sent without one."""
+
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def configure_http(**options):
+    """
+    Updates HTTP_CONFIG (pool_connections, pool_maxsize, retries, backoff_factor,
+    status_forcelist, timeout, headers, max_sessions, cache, cache_dir, cache_max_bytes)
+    and closes the existing sessions so the next get_session() call picks the new
+    settings up.
+    """
+    unknown = set(options) - set(HTTP_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown HTTP options {sorted(unknown)}. Choose from {list(HTTP_CONFIG)}.")
+    HTTP_CONFIG.update(options)
+    close_sessions()
+
+
+def get_session(proxies: dict = None) -> requests.Session:
+    """
+    Returns the shared requests.Session for the given proxies (one per proxy setup),
+    keeping connections alive per host with retries and a default timeout.
+
+    Idempotent requests (GET, HEAD, OPTIONS) are retried on connection errors and on
+    the status codes of HTTP_CONFIG["status_forcelist"], honoring Retry-After.
+
+    Sessions with proxies ignore the HTTP(S)_PROXY environment variables, which would
+    otherwise take precedence over session.proxies. At most HTTP_CONFIG["max_sessions"]
+    sessions are kept, the least recently used one is closed first.
+    """
+    key = tuple(sorted(proxies.items())) if proxies else None
+    evicted = []
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            session = _SESSIONS[key] = _create_session(proxies)
+            get_logger().debug(f"Created HTTP session{' with proxies' if proxies else ''}.")
+        _SESSIONS.move_to_end(key)
+        while len(_SESSIONS) > max(1, HTTP_CONFIG["max_sessions"]):
+            evicted.append(_SESSIONS.popitem(last=False)[1])
+    for old_session in evicted:
+        old_session.close()
+    return session
+
+
+def close_sessions():
+    """Closes all shared sessions and their connection pools."""
+    with _SESSIONS_LOCK:
+        sessions = list(_SESSIONS.values())
+        _SESSIONS.clear()
+    for session in sessions:
+        session.close()
+
+
+def _create_session(proxies=None) -> requests.Session:
+    retry = Retry(
+        total=HTTP_CONFIG["retries"],
+        backoff_factor=HTTP_CONFIG["backoff_factor"],
+        status_forcelist=HTTP_CONFIG["status_forcelist"],
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=HTTP_CONFIG["pool_connections"],
+        pool_maxsize=HTTP_CONFIG["pool_maxsize"],
+        max_retries=retry,
+        timeout=HTTP_CONFIG["timeout"],
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if HTTP_CONFIG["headers"]:
+        session.headers.update(HTTP_CONFIG["headers"])
+    if proxies:
+        # requests merges the proxy environment variables over session.proxies
+        session.trust_env = False
+        session.proxies.update(proxies)
+    return session
+
+
+# RESPONSE CACHE
+# session.get arguments that change the request beyond url and params
+_UNCACHEABLE_ARGUMENTS = {"auth", "cookies", "data", "json", "files"}
+
+
+def cached_get(url, headers: dict = None, proxies: dict = None, use_cache: bool = None, **kwargs):
+    """
+    GET through the shared session with an on-disk response cache, so repeated runs
+    download unchanged content only once.
+
+    Entries are keyed by the url plus the request headers named in the response's Vary
+    header. A stored entry is returned directly while fresh (Cache-Control max-age or
+    Expires), otherwise it is revalidated with If-None-Match / If-Modified-Since and a
+    304 answer is served from disk. Only 200 responses without no-store are cached and
+    the cache, Vary records included, is kept below HTTP_CONFIG["cache_max_bytes"] by
+    evicting the least recently used files. An entry evicted by another process while
+    being read counts as a miss.
+
+    Query params are part of the key. Calls passing arguments that change the request in
+    other ways (auth, cookies, data, json, files) bypass the cache.
+
+    Returns a requests.Response with from_cache set to True if the body came from disk.
+    """
+    session = get_session(proxies)
+    use_cache = HTTP_CONFIG["cache"] if use_cache is None else use_cache
+    if use_cache and _UNCACHEABLE_ARGUMENTS.intersection(kwargs):
+        use_cache = False
+    if not use_cache:
+        response = session.get(url, headers=headers, **kwargs)
+        response.from_cache = False
+        return response
+
+    logger = get_logger()
+    cache_dir = HTTP_CONFIG["cache_dir"] or get_cache_dir("http")
+    request_headers = CaseInsensitiveDict(session.headers)
+    request_headers.update(headers or {})
+
+    full_url = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+    url_key = hashlib.sha256(full_url.encode()).hexdigest()
+    vary_path = os.path.join(cache_dir, f"{url_key}.vary")
+    vary = _read_json(vary_path) or []
+    key = _variant_key(full_url, vary, request_headers)
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+    body_path = os.path.join(cache_dir, f"{key}.body")
+
+    meta = _read_json(meta_path)
+    if meta is not None and not os.path.exists(body_path):
+        meta = None
+
+    if meta is not None and meta.get("expires_at") and meta["expires_at"] > time.time():
+        cached = _load_cached(full_url, meta, body_path, vary_path if vary else None)
+        if cached is not None:
+            logger.debug(f"HTTP cache hit (fresh) for {url}")
+            return cached
+        meta = None
+
+    conditional_headers = dict(headers or {})
+    if meta is not None:
+        if meta["headers"].get("ETag"):
+            conditional_headers["If-None-Match"] = meta["headers"]["ETag"]
+        if meta["headers"].get("Last-Modified"):
+            conditional_headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+
+    response = session.get(url, headers=conditional_headers, **kwargs)
+
+    if response.status_code == 304 and meta is not None:
+        meta["expires_at"] = _expires_at(response.headers) or meta.get("expires_at")
+        cached = _load_cached(full_url, meta, body_path, vary_path if vary else None)
+        if cached is not None:
+            logger.debug(f"HTTP cache hit (revalidated) for {url}")
+            try:
+                _write_file(meta_path, json.dumps(meta).encode())
+            except OSError:
+                pass
+            return cached
+        # evicted while revalidating, the 304 has no body to fall back on
+        response = session.get(url, headers=headers, **kwargs)
+
+    response.from_cache = False
+    cache_control = response.headers.get("Cache-Control", "").lower()
+    if response.status_code != 200 or "no-store" in cache_control:
+        return response
+
+    response_vary = sorted(
+        name.strip().lower() for name in response.headers.get("Vary", "").split(",") if name.strip()
+    )
+    if "*" in response_vary:
+        return response
+    if response_vary != vary:
+        _write_file(vary_path, json.dumps(response_vary).encode())
+        key = _variant_key(full_url, response_vary, request_headers)
+        meta_path = os.path.join(cache_dir, f"{key}.json")
+        body_path = os.path.join(cache_dir, f"{key}.body")
+
+    meta = {
+        "url": full_url,
+        "headers": {
+            name: response.headers[name]
+            for name in ("Content-Type", "ETag", "Last-Modified", "Vary")
+            if name in response.headers
+        },
+        "expires_at": None if "no-cache" in cache_control else _expires_at(response.headers),
+    }
+    try:
+        _write_file(body_path, response.content)
+        _write_file(meta_path, json.dumps(meta).encode())
+        _evict_http_cache(cache_dir, HTTP_CONFIG["cache_max_bytes"])
+    except OSError as e:
+        logger.debug(f"Not caching {url}: {type(e).__name__}: {e}")
+    return response
+
+
+def clear_http_cache():
+    """Removes all entries of the on-disk response cache."""
+    cache_dir = HTTP_CONFIG["cache_dir"] or get_cache_dir("http")
+    for name in os.listdir(cache_dir):
+        if name.endswith((".body", ".json", ".vary")):
+            os.remove(os.path.join(cache_dir, name))
+
+
+def _variant_key(url, vary, request_headers):
+    varying = [(name, request_headers.get(name, "")) for name in vary]
+    return hashlib.sha256(repr((url, varying)).encode()).hexdigest()
+
+
+def _expires_at(headers):
+    match = re.search(r"max-age=(\d+)", headers.get("Cache-Control", ""))
+    if match:
+        return time.time() + int(match.group(1))
+    if headers.get("Expires"):
+        try:
+            return parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _cached_response(url, meta, body_path) -> requests.Response:
+    response = requests.Response()
+    with open(body_path, "rb") as f:
+        response._content = f.read()
+    response.status_code = 200
+    response.url = url
+    response.headers = CaseInsensitiveDict(meta["headers"])
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.from_cache = True
+    return response
+
+
+def _load_cached(url, meta, body_path, vary_path=None):
+    # None if another thread or process evicted the entry after it was looked up
+    try:
+        os.utime(body_path)
+        if vary_path:
+            os.utime(vary_path)
+        return _cached_response(url, meta, body_path)
+    except OSError:
+        return None
+
+
+def _read_json(file_path):
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_file(file_path, data: bytes):
+    temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, file_path)
+
+
+def _evict_http_cache(cache_dir, max_bytes):
+    # bodies carry their .json metadata, .vary records are evicted on their own and
+    # a missing one only costs a miss before the response rewrites it
+    entries = {}
+    total = 0
+    for entry in os.scandir(cache_dir):
+        base, ext = os.path.splitext(entry.path)
+        if ext not in (".body", ".json", ".vary"):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        key = entry.path if ext == ".vary" else base
+        mtime, size, paths = entries.get(key, (0.0, 0, []))
+        if ext != ".json":
+            mtime = stat.st_mtime
+        entries[key] = (mtime, size + stat.st_size, paths + [entry.path])
+        total += stat.st_size
+    if total <= max_bytes:
+        return
+    for _, size, paths in sorted(entries.values()):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        total -= size
+        if total <= max_bytes:
+            break
@@ -1,4 +1,9 @@
-import logging, os
+import logging, logging.handlers, os, queue, atexit, json, gzip, shutil, copy, random, threading, time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .tokenbucket import TokenBucket
 
 from termcolor import colored
 from datetime import datetime
@@ -6,6 +11,17 @@ from datetime import datetime
 
 LOGGER_NAME = "global_logger"
 
+# handlers and queue listeners installed by config_logger per logger name
+_HANDLERS = {}
+_LISTENERS = {}
+_FILTERS = {}
+
+# context fields added to every record logged inside log_context()
+_CONTEXT = ContextVar("log_context", default={})
+
+# attributes every LogRecord has, everything else was passed via 'extra' or log_context
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
 
 def get_logger() -> object:
     return logging.getLogger(LOGGER_NAME)
@@ -24,11 +40,43 @@ def config_logger(
     logs_dir: str = "logs",
     prints: bool = False,
     encoding: str = None,
+    use_queue: bool = False,
+    log_format: str = "text",
+    max_bytes: int = None,
+    backup_count: int = 5,
+    compress: bool = False,
+    rate_limit: float = None,
+    rate_limit_burst: int = 10,
+    deduplicate: bool = False,
+    debug_sample_ratio: float = None,
 ) -> object:
+    """
+    Configures the logger with a console and/or file handler. Calling it again for the
+    same name replaces the handlers of the previous call instead of stacking them.
+
+    With use_queue=True the handlers run on a background QueueListener thread and the
+    logging call sites only put records on a queue, so no disk or terminal I/O happens
+    on the caller's thread. The listener is flushed at exit or via stop_logging().
+
+    With log_format="json" every record is written as one JSON object per line including
+    the fields passed via extra={...} or log_context(). max_bytes rotates the log file at
+    that size keeping backup_count old files, gzipped if compress=True.
+
+    Log with %-style arguments (logger.info("Row %s done", i)) so the message is only
+    rendered when a handler actually emits the record.
+
+    For hot loops the volume can be cut down with logger filters:
+        rate_limit: Records per second allowed per call site (after a burst of
+            rate_limit_burst), see RateLimitFilter. Errors are never limited.
+        deduplicate: Collapse repeated identical messages, see DeduplicateFilter.
+        debug_sample_ratio: Share of DEBUG records kept, see SamplingFilter.
+    """
     global LOGGER_NAME
     LOGGER_NAME = name
 
     logger = logging.getLogger(name)
+    _remove_handlers(logger)
+    handlers = []
 
     if prints:  # can get improved
         if lvl_console and lvl_file:
@@ -72,15 +120,33 @@ def config_logger(
         if not os.path.exists(logs_dir):
             os.makedirs(logs_dir)
 
-        f_handler = logging.FileHandler(
-            filename=os.path.join(logs_dir, f"{file_name}_{file_timestamp}.log"),
-            mode="a",
-            encoding=encoding,
-        )
-        f_format = logging.Formatter(
-            fmt=fmt_file,
-            datefmt=fmt_date,
+        file_path = os.path.join(
+            logs_dir, f"{file_name}_{file_timestamp}.{'jsonl' if log_format == 'json' else 'log'}"
         )
+        if max_bytes:
+            f_handler = logging.handlers.RotatingFileHandler(
+                filename=file_path,
+                mode="a",
+                maxBytes=max_bytes,
+                backupCount=backup_count,
+                encoding=encoding,
+            )
+            if compress:
+                f_handler.namer = lambda default_name: f"{default_name}.gz"
+                f_handler.rotator = _gzip_rotator
+        else:
+            f_handler = logging.FileHandler(
+                filename=file_path,
+                mode="a",
+                encoding=encoding,
+            )
+        if log_format == "json":
+            f_format = JsonFormatter()
+        else:
+            f_format = logging.Formatter(
+                fmt=fmt_file,
+                datefmt=fmt_date,
+            )
         if lvl_file in level_options:
             lvl_file = logging.getLevelName(lvl_file.upper())
         else:
@@ -91,14 +157,17 @@ def config_logger(
 
         f_handler.setLevel(lvl_file)
         f_handler.setFormatter(f_format)
-        logger.addHandler(f_handler)
+        handlers.append(f_handler)
 
     if lvl_console:
         c_handler = logging.StreamHandler()
-        c_format = logging.Formatter(
-            fmt=fmt_console,
-            datefmt=fmt_date,
-        )
+        if log_format == "json":
+            c_format = JsonFormatter()
+        else:
+            c_format = logging.Formatter(
+                fmt=fmt_console,
+                datefmt=fmt_date,
+            )
         if lvl_console in level_options:
             lvl_console = logging.getLevelName(lvl_console.upper())
         else:
@@ -109,7 +178,32 @@ def config_logger(
 
         c_handler.setLevel(lvl_console)
         c_handler.setFormatter(c_format)
-        logger.addHandler(c_handler)
+        handlers.append(c_handler)
+
+    if use_queue and handlers:
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _LISTENERS[name] = listener
+        _HANDLERS[name] = [PreservingQueueHandler(log_queue)]
+    else:
+        _HANDLERS[name] = handlers
+
+    for handler in _HANDLERS[name]:
+        # runs on the caller's thread, where the log_context is set
+        handler.addFilter(ContextFilter())
+        logger.addHandler(handler)
+
+    filters = []
+    if debug_sample_ratio is not None:
+        filters.append(SamplingFilter(debug_sample_ratio))
+    if deduplicate:
+        filters.append(DeduplicateFilter(logger))
+    if rate_limit:
+        filters.append(RateLimitFilter(rate_limit, rate_limit_burst))
+    for log_filter in filters:
+        logger.addFilter(log_filter)
+    _FILTERS[name] = filters
 
     if lvl_root in level_options:
         logger.setLevel(lvl_root.upper())
@@ -119,3 +213,205 @@ def config_logger(
         if prints:
             print(f"Set the root level to {default_lvl_root}.")
     return logger
+
+
+class PreservingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps the traceback in exc_text instead of merging it into the
+    message, so the listener's formatters (e.g. JsonFormatter's "exception" key) render
+    records the same way as without the queue.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None  # tracebacks hold frames, exc_text has everything needed
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects including all extra and context fields."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, self.datefmt)
+            if self.datefmt
+            else datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ContextFilter(logging.Filter):
+    """Adds the fields of the current log_context() to the record (explicit extras win)."""
+
+    def filter(self, record):
+        for key, value in _CONTEXT.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    Attaches fields (e.g. row=i) to every record logged inside the block on this thread or task.
+
+        with log_context(row=i):
+            logger.info("Upscaled %s", file)
+    """
+    token = _CONTEXT.set({**_CONTEXT.get(), **fields})
+    try:
+        yield
+    finally:
+        _CONTEXT.reset(token)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only the given ratio (0-1) of the records at or below level, chosen at random."""
+
+    def __init__(self, ratio, level=logging.DEBUG):
+        super().__init__()
+        self.ratio = ratio
+        self.level = level
+
+    def filter(self, record):
+        return record.levelno > self.level or random.random() < self.ratio
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limits every call site (file and line) to 'rate' records per second after an initial
+    burst. The next record let through mentions how many were suppressed in between.
+    Records above max_level always pass.
+    """
+
+    def __init__(self, rate=1.0, burst=10, max_level=logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_level = max_level
+        self._buckets = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            bucket = self._buckets.get(site)
+            if bucket is None:
+                bucket = self._buckets[site] = TokenBucket(self.burst, self.rate)
+            if bucket.consume(1) > 0:
+                self._suppressed[site] = self._suppressed.get(site, 0) + 1
+                return False
+            suppressed = self._suppressed.pop(site, 0)
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+class DeduplicateFilter(logging.Filter):
+    """
+    Collapses consecutive identical messages into one "repeated N times" summary, which is
+    emitted when a different message arrives, every flush_interval seconds while the
+    repetition goes on, and when the logger is reconfigured or stopped.
+    """
+
+    def __init__(self, logger, flush_interval=10.0):
+        super().__init__()
+        self.logger = logger
+        self.flush_interval = flush_interval
+        self._last_key = None
+        self._last_record = None
+        self._repeats = 0
+        self._first_repeat = None
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.levelno, record.pathname, record.lineno, record.getMessage())
+        with self._lock:
+            if key == self._last_key:
+                self._repeats += 1
+                if self._first_repeat is None:
+                    self._first_repeat = time.monotonic()
+                if time.monotonic() - self._first_repeat < self.flush_interval:
+                    return False
+                summary = self._summary()
+                passes = False  # the repeat is part of the summary
+            else:
+                summary = self._summary()
+                self._last_key = key
+                self._last_record = record
+                passes = True
+        if summary:
+            self.logger.callHandlers(summary)
+        return passes
+
+    def flush(self):
+        with self._lock:
+            summary = self._summary()
+        if summary:
+            self.logger.callHandlers(summary)
+
+    def _summary(self):
+        if not self._repeats:
+            return None
+        summary = copy.copy(self._last_record)
+        summary.msg = f"{self._last_record.getMessage()} (repeated {self._repeats} times)"
+        summary.args = None
+        summary.exc_info = None
+        summary.exc_text = None
+        summary.created = time.time()
+        self._repeats = 0
+        self._first_repeat = None
+        return summary
+
+
+def _gzip_rotator(source, dest):
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def stop_logging(name: str = None):
+    """Flushes and stops the queue listener(s) and closes the handlers set up by config_logger."""
+    for logger_name in [name] if name else list(_HANDLERS):
+        _remove_handlers(logging.getLogger(logger_name))
+
+
+def _remove_handlers(logger):
+    for log_filter in _FILTERS.pop(logger.name, []):
+        if isinstance(log_filter, DeduplicateFilter):
+            log_filter.flush()
+        logger.removeFilter(log_filter)
+    listener = _LISTENERS.pop(logger.name, None)
+    if listener:
+        listener.stop()  # processes the records still in the queue
+        for handler in listener.handlers:
+            handler.close()
+    for handler in _HANDLERS.pop(logger.name, []):
+        logger.removeHandler(handler)
+        handler.close()
+
+
+atexit.register(stop_logging)
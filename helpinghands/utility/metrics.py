@@ -0,0 +1,143 @@
+import json, threading
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of integer values (nanoseconds). Values are kept in log-linear
+    buckets with 2**(precision_bits - 1) sub-buckets per power of two, so every recorded
+    value is reproduced within a relative error of about 2**(1 - precision_bits).
+    """
+
+    def __init__(self, precision_bits=7):
+        self.precision_bits = precision_bits
+        self._half = 1 << (precision_bits - 1)
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percent):
+        """Returns the value at the given percentile (0-100), or None if empty."""
+        if not self.count:
+            return None
+        threshold = self.count * percent / 100
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= threshold:
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def _index(self, value):
+        exponent = value.bit_length() - self.precision_bits
+        if exponent <= 0:
+            return value
+        return exponent * self._half + (value >> exponent)
+
+    def _value(self, index):
+        """Midpoint of the bucket at index."""
+        if index < 2 * self._half:
+            return index
+        exponent = index // self._half - 1
+        mantissa = index - exponent * self._half
+        return (mantissa << exponent) + (1 << (exponent - 1))
+
+
+class MetricsRegistry:
+    """In-process registry of call counts, error counts and latency histograms per function."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, duration_ns, error=False):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = {"errors": 0, "histogram": LatencyHistogram()}
+            metric["histogram"].record(duration_ns)
+            if error:
+                metric["errors"] += 1
+
+    def snapshot(self) -> dict:
+        """Returns calls, errors and latency statistics in seconds per function."""
+        with self._lock:
+            snapshot = {}
+            for name, metric in self._metrics.items():
+                histogram = metric["histogram"]
+                snapshot[name] = {
+                    "calls": histogram.count,
+                    "errors": metric["errors"],
+                    "total_seconds": histogram.total / 1e9,
+                    "mean_seconds": histogram.total / histogram.count / 1e9,
+                    "min_seconds": histogram.min / 1e9,
+                    "max_seconds": histogram.max / 1e9,
+                    "p50_seconds": histogram.percentile(50) / 1e9,
+                    "p95_seconds": histogram.percentile(95) / 1e9,
+                    "p99_seconds": histogram.percentile(99) / 1e9,
+                }
+            return snapshot
+
+    def to_json(self, file_path=None, indent=2) -> str:
+        """Returns the snapshot as JSON and writes it to file_path if given."""
+        output = json.dumps(self.snapshot(), indent=indent)
+        if file_path:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(output)
+        return output
+
+    def to_prometheus(self, prefix="helpinghands") -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        labels = {_escape_label_value(name): values for name, values in self.snapshot().items()}
+        lines = [
+            f"# HELP {prefix}_function_calls_total Number of calls per function.",
+            f"# TYPE {prefix}_function_calls_total counter",
+        ]
+        for label, values in labels.items():
+            lines.append(f'{prefix}_function_calls_total{{function="{label}"}} {values["calls"]}')
+
+        lines += [
+            f"# HELP {prefix}_function_errors_total Number of calls per function that raised.",
+            f"# TYPE {prefix}_function_errors_total counter",
+        ]
+        for label, values in labels.items():
+            lines.append(f'{prefix}_function_errors_total{{function="{label}"}} {values["errors"]}')
+
+        lines += [
+            f"# HELP {prefix}_function_duration_seconds Latency per function.",
+            f"# TYPE {prefix}_function_duration_seconds summary",
+        ]
+        for label, values in labels.items():
+            for quantile, key in (("0.5", "p50_seconds"), ("0.95", "p95_seconds"), ("0.99", "p99_seconds")):
+                lines.append(
+                    f'{prefix}_function_duration_seconds{{function="{label}",quantile="{quantile}"}} {values[key]}'
+                )
+            lines.append(f'{prefix}_function_duration_seconds_sum{{function="{label}"}} {values["total_seconds"]}')
+            lines.append(f'{prefix}_function_duration_seconds_count{{function="{label}"}} {values["calls"]}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._metrics = {}
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return REGISTRY
@@ -0,0 +1,192 @@
+from ..utility.logger import get_logger
+from ..utility.metrics import get_registry
+
+import hashlib, threading, time
+from dataclasses import dataclass
+from typing import Optional
+
+
+# lowercase page title fragments specific to block and challenge pages
+BAN_MARKERS = (
+    "access denied",
+    "attention required! | cloudflare",
+    "are you a robot",
+    "captcha",
+    "unusual traffic",
+    "too many requests",
+)
+
+
+class ProxyFailureError(Exception):
+    """A page load failed because of the proxy, not the website."""
+
+
+class ProxyBannedError(ProxyFailureError):
+    pass
+
+
+@dataclass
+class ProxyEndpoint:
+    host: str
+    username: Optional[str] = None
+    password: Optional[str] = None
+    requests: int = 0
+    errors: int = 0
+    error_ewma: float = 0.0
+    latency_ewma: Optional[float] = None
+    bans: int = 0
+    banned_until: float = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.username}@{self.host}" if self.username else self.host
+
+    @property
+    def metric_name(self) -> str:
+        """host:port plus a hash of the username, so credentials stay out of exported metrics."""
+        if not self.username:
+            return self.host
+        return f"{self.host}#{hashlib.sha256(self.username.encode()).hexdigest()[:8]}"
+
+    def as_wire_proxy(self) -> dict:
+        credentials = f"{self.username}:{self.password}@" if self.username else ""
+        return {
+            "http": f"http://{credentials}{self.host}",
+            "https": f"http://{credentials}{self.host}",
+        }
+
+
+class ProxyPool:
+    """
+    Tracks latency, error rate and bans per proxy endpoint and switches the upstream proxy
+    of a running selenium-wire driver to the healthiest one, instead of restarting Chrome.
+
+        pool = ProxyPool([{"host": "brd.superproxy.io:22225", "username": ..., "password": ...}, ...])
+        open_website(url, config, proxy_pool=pool)
+        pool.stats()
+
+    Untested endpoints are tried first, then the lowest latency EWMA plus a penalty per
+    error rate wins. Banned endpoints are skipped for ban_cooldown seconds. Every recorded
+    request also goes into the metrics registry as "proxy:<host:port>#<username hash>".
+
+    Parameters:
+        proxies: List of proxy_config dicts with host, username and password.
+        alpha: Weight of the newest observation in the moving averages.
+        ban_cooldown: Seconds a banned endpoint is not chosen.
+        error_penalty: Seconds added to the score at an error rate of 100%.
+        ban_markers: Lowercase page title fragments treated as a ban.
+        registry: MetricsRegistry to record into, defaults to get_registry().
+    """
+
+    def __init__(
+        self,
+        proxies: list,
+        alpha: float = 0.3,
+        ban_cooldown: float = 300,
+        error_penalty: float = 10,
+        ban_markers: tuple = BAN_MARKERS,
+        registry=None,
+    ):
+        self.alpha = alpha
+        self.ban_cooldown = ban_cooldown
+        self.error_penalty = error_penalty
+        self.ban_markers = ban_markers
+        self.registry = registry or get_registry()
+        self.endpoints = {}
+        self._assigned = {}
+        self._lock = threading.Lock()
+        for proxy_config in proxies:
+            self.add(proxy_config)
+
+    def add(self, proxy_config: dict) -> ProxyEndpoint:
+        if not proxy_config.get("host"):
+            raise ValueError("The proxy host must be provided.")
+        endpoint = ProxyEndpoint(
+            proxy_config["host"], proxy_config.get("username"), proxy_config.get("password")
+        )
+        with self._lock:
+            return self.endpoints.setdefault(endpoint.key, endpoint)
+
+    def choose(self, exclude: str = None) -> ProxyEndpoint:
+        """Returns the healthiest endpoint that is not banned, avoiding exclude if possible."""
+        logger = get_logger()
+        now = time.time()
+        with self._lock:
+            if not self.endpoints:
+                raise ValueError("The ProxyPool has no endpoints.")
+            candidates = [e for e in self.endpoints.values() if e.banned_until <= now]
+            if not candidates:
+                endpoint = min(self.endpoints.values(), key=lambda e: e.banned_until)
+                logger.warning(f"All proxies are banned, using {endpoint.key} whose ban ends first.")
+                return endpoint
+            if len(candidates) > 1:
+                candidates = [e for e in candidates if e.key != exclude] or candidates
+            return min(candidates, key=lambda e: (self._score(e), e.requests))
+
+    def apply(self, driver, endpoint: ProxyEndpoint = None) -> ProxyEndpoint:
+        """Switches the upstream proxy of a selenium-wire driver without restarting it."""
+        if not hasattr(driver, "proxy"):
+            raise ValueError("Switching proxies in a running browser needs proxy_mode 'wire'.")
+        endpoint = endpoint or self.choose()
+        driver.proxy = endpoint.as_wire_proxy()
+        with self._lock:
+            self._assigned[id(driver)] = endpoint.key
+        get_logger().debug(f"Switched browser proxy to {endpoint.key}")
+        return endpoint
+
+    def rotate(self, driver) -> ProxyEndpoint:
+        """Moves the driver to the healthiest other endpoint."""
+        return self.apply(driver, self.choose(exclude=self.current(driver)))
+
+    def current(self, driver) -> Optional[str]:
+        """Key of the endpoint the driver was last switched to."""
+        with self._lock:
+            return self._assigned.get(id(driver))
+
+    def record(self, key: str, latency: float = None, error: bool = False, banned: bool = False):
+        """Records one request through the endpoint, latency in seconds."""
+        with self._lock:
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                return
+            endpoint.requests += 1
+            failed = error or banned
+            endpoint.errors += failed
+            endpoint.error_ewma = self.alpha * failed + (1 - self.alpha) * endpoint.error_ewma
+            if latency is not None and not failed:
+                endpoint.latency_ewma = (
+                    latency
+                    if endpoint.latency_ewma is None
+                    else self.alpha * latency + (1 - self.alpha) * endpoint.latency_ewma
+                )
+            if banned:
+                endpoint.bans += 1
+                endpoint.banned_until = time.time() + self.ban_cooldown
+            metric_name = f"proxy:{endpoint.metric_name}"
+        self.registry.record(metric_name, int((latency or 0) * 1e9), error=failed)
+
+    def looks_banned(self, page_title: str) -> bool:
+        title = (page_title or "").lower()
+        return any(marker in title for marker in self.ban_markers)
+
+    def stats(self) -> dict:
+        """Requests, error rate, latency EWMA, bans and score per endpoint."""
+        now = time.time()
+        with self._lock:
+            return {
+                key: {
+                    "host": endpoint.host,
+                    "requests": endpoint.requests,
+                    "errors": endpoint.errors,
+                    "error_rate": endpoint.errors / endpoint.requests if endpoint.requests else 0.0,
+                    "error_ewma": endpoint.error_ewma,
+                    "latency_ewma": endpoint.latency_ewma,
+                    "bans": endpoint.bans,
+                    "banned": endpoint.banned_until > now,
+                    "score": self._score(endpoint),
+                }
+                for key, endpoint in self.endpoints.items()
+            }
+
+    def _score(self, endpoint: ProxyEndpoint) -> float:
+        return (endpoint.latency_ewma or 0.0) + self.error_penalty * endpoint.error_ewma
@@ -0,0 +1,166 @@
+from ..utility.logger import get_logger
+from ..utility.helper import start_tracemalloc, stop_tracemalloc
+
+import gc, json, os, threading, time, tracemalloc, psutil
+from collections import deque
+from contextlib import contextmanager
+
+
+PEAK_KEYS = ("rss_mb", "cpu_percent", "threads", "open_fds")
+
+
+class ResourceSampler:
+    """
+    Samples RSS, CPU%, thread count, open file descriptors and GC stats of the current
+    process on a background thread into a fixed-size ring buffer.
+
+    Peak values are tracked per named phase, and with tracemalloc_top the top N
+    allocation differences between the start and end of each phase are kept.
+
+        with ResourceSampler(interval=1) as sampler:
+            with sampler.phase("upscale"):
+                super_image_loop(...)
+            sampler.export("resources.json")
+
+    Parameters:
+        interval: Seconds between samples.
+        capacity: Number of samples kept in the ring buffer.
+        tracemalloc_top: Number of allocation differences stored per phase (0 disables).
+        log_samples: Also log every sample on debug level.
+    """
+
+    def __init__(self, interval=1.0, capacity=3600, tracemalloc_top=0, log_samples=False):
+        self.interval = interval
+        self.tracemalloc_top = tracemalloc_top
+        self.log_samples = log_samples
+        self.samples = deque(maxlen=capacity)
+        self.phases = {}
+        self._active_phases = []
+        self._process = psutil.Process()
+        self._process.cpu_percent(None)  # first call only sets the reference point
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ResourceSampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def sample(self) -> dict:
+        """Takes one sample now, stores it and updates the peaks of the active phases."""
+        process = self._process
+        with process.oneshot():
+            current = {
+                "time": time.time(),
+                "rss_mb": process.memory_info().rss / (1024**2),
+                "cpu_percent": process.cpu_percent(None),
+                "threads": process.num_threads(),
+                "open_fds": process.num_fds() if hasattr(process, "num_fds") else process.num_handles(),
+            }
+        current["gc_counts"] = gc.get_count()
+        current["gc_collections"] = sum(stats["collections"] for stats in gc.get_stats())
+
+        with self._lock:
+            current["phase"] = self._active_phases[-1] if self._active_phases else None
+            self.samples.append(current)
+            for name in self._active_phases:
+                peaks = self.phases[name]["peaks"]
+                for key in PEAK_KEYS:
+                    peaks[key] = max(peaks.get(key, current[key]), current[key])
+
+        if self.log_samples:
+            get_logger().debug(
+                "Resources: %.1f MB RSS, %.1f%% CPU, %s threads, %s open fds",
+                current["rss_mb"],
+                current["cpu_percent"],
+                current["threads"],
+                current["open_fds"],
+            )
+        return current
+
+    @contextmanager
+    def phase(self, name):
+        """Tracks peak values (and optionally allocations) while the block runs under name."""
+        with self._lock:
+            entry = self.phases.setdefault(name, {"runs": 0, "seconds": 0.0, "peaks": {}})
+            entry["runs"] += 1
+            self._active_phases.append(name)
+
+        before = None
+        if self.tracemalloc_top:
+            start_tracemalloc()
+            try:
+                before = tracemalloc.take_snapshot()
+            except RuntimeError:  # tracing stopped by code outside start/stop_tracemalloc
+                stop_tracemalloc()
+
+        self.sample()
+        start = time.monotonic()
+        try:
+            yield self
+        finally:
+            self.sample()
+            with self._lock:
+                entry["seconds"] += time.monotonic() - start
+                self._active_phases.remove(name)
+
+            if before is not None:
+                try:
+                    after = tracemalloc.take_snapshot()
+                    ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+                    top_stats = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "lineno")
+                    entry["tracemalloc_top"] = [str(stat) for stat in top_stats[: self.tracemalloc_top]]
+                except RuntimeError as e:
+                    get_logger().warning(f"No allocation stats for phase '{name}': {e}")
+                finally:
+                    stop_tracemalloc()
+
+    def snapshot(self) -> dict:
+        """Returns the latest sample, the peak of every value and the per-phase stats."""
+        with self._lock:
+            samples = list(self.samples)
+            phases = json.loads(json.dumps(self.phases))
+        peaks = {key: max((sample[key] for sample in samples), default=None) for key in PEAK_KEYS}
+        return {
+            "latest": samples[-1] if samples else None,
+            "peaks": peaks,
+            "phases": phases,
+            "sample_count": len(samples),
+        }
+
+    def export(self, file_path=None) -> str:
+        """Returns snapshot() plus all buffered samples as JSON and writes it to file_path if given."""
+        with self._lock:
+            samples = list(self.samples)
+        output = json.dumps({**self.snapshot(), "samples": samples}, indent=2)
+        if file_path:
+            directory = os.path.dirname(file_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(output)
+        return output
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except psutil.Error as e:
+                get_logger().warning(f"Resource sampling failed: {type(e).__name__}: {e}")
+            self._stop_event.wait(self.interval)
@@ -0,0 +1,151 @@
+import heapq, itertools, threading, time
+
+
+PRIORITIES = {"interactive": 0, "default": 1, "batch": 2}
+
+
+class RequestScheduler:
+    """
+    Hands out the budget of a TokenBucket or RateLimiter by priority class.
+
+    Waiting calls of a higher priority class (lower rank) always go first. Within a
+    class the callers are served with fair queuing, so one busy caller cannot starve
+    the others of the same class. Queue waits are tracked per class and per caller.
+
+    Parameters:
+        limiter: A TokenBucket, SharedTokenBucket or (Adaptive)RateLimiter.
+        priorities: Mapping of priority class name to rank. Defaults to PRIORITIES.
+    """
+
+    def __init__(self, limiter, priorities=None):
+        self.limiter = limiter
+        self.priorities = dict(priorities or PRIORITIES)
+        self._cond = threading.Condition()
+        self._queue = []
+        self._counter = itertools.count()
+        self._virtual_time = {}
+        self._finish_tags = {}
+        self._metrics = {"priorities": {}, "callers": {}}
+
+    def acquire(self, priority="default", caller=None, tokens=0, timeout=None) -> float:
+        """Blocks until the call is due and the limiter has budget. Returns the queue wait."""
+        if priority not in self.priorities:
+            raise ValueError(f"Unknown priority '{priority}'. Choose from {list(self.priorities)}.")
+        rank = self.priorities[priority]
+        caller = caller or threading.current_thread().name
+
+        with self._cond:
+            # fair queuing: each caller advances its own virtual finish time per class
+            start_tag = max(
+                self._virtual_time.get(rank, 0.0), self._finish_tags.get((rank, caller), 0.0)
+            )
+            finish_tag = start_tag + 1
+            self._finish_tags[(rank, caller)] = finish_tag
+
+            ticket = (rank, finish_tag, next(self._counter))
+            heapq.heappush(self._queue, ticket)
+            enqueued = time.monotonic()
+
+            try:
+                while True:
+                    wait = None
+                    if self._queue[0] == ticket:
+                        wait = self._try_acquire(tokens)
+                        if wait == 0:
+                            heapq.heappop(self._queue)
+                            self._virtual_time[rank] = start_tag
+                            self._forget_finished(rank, start_tag)
+                            queue_wait = time.monotonic() - enqueued
+                            self._record(priority, caller, queue_wait)
+                            self._cond.notify_all()
+                            return queue_wait
+
+                    if timeout is not None:
+                        remaining = timeout - (time.monotonic() - enqueued)
+                        if remaining <= 0:
+                            raise TimeoutError(f"Request not scheduled within {timeout} seconds.")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def client(self, priority="default", caller=None):
+        """Returns a handle that can be passed as 'rate_limiter' to the ai functions."""
+        return ScheduledLimiter(self, priority, caller)
+
+    def stats(self) -> dict:
+        """Request counts plus average and maximum queue wait per priority class and caller."""
+        with self._cond:
+            snapshot = {
+                group: {
+                    key: {
+                        "count": values["count"],
+                        "avg_queue_wait": values["total_wait"] / values["count"],
+                        "max_queue_wait": values["max_wait"],
+                    }
+                    for key, values in entries.items()
+                }
+                for group, entries in self._metrics.items()
+            }
+            snapshot["queued"] = len(self._queue)
+            return snapshot
+
+    def reset_stats(self):
+        with self._cond:
+            self._metrics = {"priorities": {}, "callers": {}}
+
+    def _try_acquire(self, tokens):
+        if hasattr(self.limiter, "try_acquire"):
+            return self.limiter.try_acquire(tokens=tokens)
+        return self.limiter.consume(1)
+
+    def _forget_finished(self, rank, virtual_time):
+        # a finish tag behind the virtual time starts the caller's next request at the
+        # virtual time anyway, and once the class has no waiting calls it starts over,
+        # so only the tags of callers still ahead of the others are kept
+        idle = not any(ticket[0] == rank for ticket in self._queue)
+        if idle:
+            self._virtual_time.pop(rank, None)
+        finished = [
+            key
+            for key, tag in self._finish_tags.items()
+            if key[0] == rank and (idle or tag <= virtual_time)
+        ]
+        for key in finished:
+            del self._finish_tags[key]
+
+    def _record(self, priority, caller, queue_wait):
+        for group, key in (("priorities", priority), ("callers", caller)):
+            values = self._metrics[group].setdefault(
+                key, {"count": 0, "total_wait": 0.0, "max_wait": 0.0}
+            )
+            values["count"] += 1
+            values["total_wait"] += queue_wait
+            values["max_wait"] = max(values["max_wait"], queue_wait)
+
+
+class ScheduledLimiter:
+    """RateLimiter look-alike that routes every acquire through a RequestScheduler."""
+
+    def __init__(self, scheduler, priority="default", caller=None):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.caller = caller
+
+    def acquire(self, tokens=0, requests=1, timeout=None) -> float:
+        return self.scheduler.acquire(self.priority, self.caller, tokens=tokens, timeout=timeout)
+
+    def clamp_tokens(self, tokens) -> int:
+        limiter = self.scheduler.limiter
+        if hasattr(limiter, "clamp_tokens"):
+            return limiter.clamp_tokens(tokens)
+        return tokens
+
+    def update_from_headers(self, headers):
+        limiter = self.scheduler.limiter
+        if hasattr(limiter, "update_from_headers"):
+            limiter.update_from_headers(headers)
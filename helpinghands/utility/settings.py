@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 import os
 import sys
 import json
+import time
+import threading
 from termcolor import colored
 
 
@@ -69,3 +71,157 @@ def load_settings(
     except Exception as e:
         logger.error(f"Unexpected {type(e).__name__}: {e}")
         raise
+
+
+class Settings:
+    """
+    Settings that are loaded once and then served from memory, so hot paths can read them
+    without file I/O. Layers are merged in this order, later ones win:
+
+        defaults < JSON settings file < environment variables in secrets_keys_list < overrides
+
+    The JSON file is parsed again only when its mtime changes. get() checks the mtime at
+    most every check_interval seconds, or a background watcher does it (watch=True).
+    """
+
+    def __init__(
+        self,
+        settings_file=None,
+        secrets_keys_list=None,
+        dotenv_path=None,
+        remote_env="REMOTE_ENV",
+        default_settings_file="data/settings.json",
+        defaults=None,
+        overrides=None,
+        check_interval=1.0,
+        watch=False,
+    ):
+        self.settings_path = settings_file if settings_file else default_settings_file
+        self.secrets_keys_list = secrets_keys_list or []
+        self.defaults = dict(defaults or {})
+        self.overrides = dict(overrides or {})
+        self.check_interval = check_interval
+        self._data = {}
+        self._mtime = None
+        self._failed_mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher = None
+
+        if os.getenv(remote_env) is None:
+            if not dotenv_path:
+                # Load .env file relative to the main script directory
+                dotenv_path = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), ".env")
+            load_dotenv(dotenv_path)
+
+        self.reload(force=True)
+        if watch:
+            self.start_watcher()
+
+    def reload(self, force=False) -> bool:
+        """Re-reads the settings file if it changed (or force=True). Returns True if it was reloaded."""
+        logger = get_logger()
+        try:
+            mtime = os.stat(self.settings_path).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Settings file not found: {self.settings_path}")
+
+        with self._lock:
+            self._last_check = time.monotonic()
+            if not force and mtime in (self._mtime, self._failed_mtime):
+                return False
+
+            try:
+                with open(self.settings_path, "r") as fp:
+                    file_settings = json.load(fp)
+            except json.JSONDecodeError:
+                logger.error(f"Error decoding JSON from settings file: {self.settings_path}")
+                if self._mtime is None:
+                    raise
+                self._failed_mtime = mtime  # parse this version only once
+                return False  # keep serving the last valid settings
+
+            secrets_dict = {}
+            for secret_key in self.secrets_keys_list:
+                value = os.getenv(secret_key)
+                if value:
+                    secrets_dict[secret_key] = value
+                else:
+                    logger.warning(f"Missing environment variable: {secret_key}")
+
+            self._data = {**self.defaults, **file_settings, **secrets_dict, **self.overrides}
+            self._mtime = mtime
+            self._failed_mtime = None
+            logger.debug(f"Loaded settings from {self.settings_path}")
+            return True
+
+    def get(self, key, default=None):
+        self._check()
+        return self._data.get(key, default)
+
+    def __getitem__(self, key):
+        self._check()
+        return self._data[key]
+
+    def __contains__(self, key):
+        self._check()
+        return key in self._data
+
+    def as_dict(self) -> dict:
+        self._check()
+        return dict(self._data)
+
+    def start_watcher(self, interval=None):
+        """Reloads the settings in a background thread whenever the file changes."""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval or self.check_interval or 1.0,), name="SettingsWatcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop_event.set()
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
+
+    def _check(self):
+        if self._watcher or self.check_interval is None:
+            return
+        if time.monotonic() - self._last_check >= self.check_interval:
+            try:
+                self.reload()
+            except FileNotFoundError as e:
+                get_logger().warning(f"{e}. Keeping the loaded settings.")
+                self._last_check = time.monotonic()
+
+    def _watch(self, interval):
+        while not self._stop_event.wait(interval):
+            try:
+                self.reload()
+            except FileNotFoundError as e:
+                get_logger().warning(f"{e}. Keeping the loaded settings.")
+
+
+_SETTINGS = {}
+
+
+def get_settings(settings_file=None, **kwargs) -> Settings:
+    """
+    Returns the Settings for settings_file, creating and caching it on the first call.
+
+    The keyword arguments only apply to that first call. Later calls may omit them, but
+    raise a ValueError if they pass different ones.
+    """
+    key = os.path.abspath(settings_file or kwargs.get("default_settings_file", "data/settings.json"))
+    if key not in _SETTINGS:
+        _SETTINGS[key] = (Settings(settings_file, **kwargs), kwargs)
+    settings, options = _SETTINGS[key]
+    if kwargs and kwargs != options:
+        raise ValueError(
+            f"Settings for {key} were already created with {options}, got {kwargs}."
+        )
+    return settings
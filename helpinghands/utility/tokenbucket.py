@@ -1,4 +1,6 @@
-import time
+import asyncio, threading, time, sqlite3, os, re
+
+from contextlib import contextmanager
 
 
 class TokenBucket:
@@ -10,28 +12,265 @@ class TokenBucket:
         self.fill_rate = float(fill_rate)
         self.timestamp = time.monotonic()
         self.activated = activated
+        self._lock = threading.Lock()
 
     def consume(self, tokens):
         """Consume tokens from the bucket. Returns 0 if there were sufficient
         tokens, otherwise the expected time until enough tokens become available."""
         if not self.activated:
             return 0
-        if tokens <= self._tokens:
-            self._tokens -= tokens
-            return 0
-        else:
-            deficit = tokens - self._tokens
-            wait = deficit / self.fill_rate
-            return wait
+        with self._state():
+            self._refill()
+            if tokens <= self._tokens:
+                self._tokens -= tokens
+                return 0
+            else:
+                deficit = tokens - self._tokens
+                wait = deficit / self.fill_rate
+                return wait
+
+    def release(self, tokens):
+        """Puts tokens back into the bucket (e.g. when a combined acquire failed)."""
+        if not self.activated:
+            return
+        with self._state():
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + tokens)
 
     def refill(self):
         """Refill tokens in the bucket based on fill_rate. Called automatically during consume."""
-        now = time.monotonic()
+        with self._state():
+            self._refill()
+
+    def resize(self, capacity=None, tokens=None, fill_rate=None):
+        """Adjusts the bucket on the fly, e.g. from rate limit headers of an API response."""
+        with self._state():
+            self._refill()
+            if capacity is not None:
+                self.capacity = float(capacity)
+            if fill_rate is not None and fill_rate > 0:
+                self.fill_rate = float(fill_rate)
+            if tokens is not None:
+                self._tokens = float(tokens)
+            self._tokens = min(self.capacity, max(0.0, self._tokens))
+
+    @contextmanager
+    def _state(self):
+        with self._lock:
+            yield
+
+    def _clock(self):
+        return time.monotonic()
+
+    def _refill(self):
+        now = self._clock()
         delta = now - self.timestamp
         self._tokens = min(self.capacity, self._tokens + self.fill_rate * delta)
         self.timestamp = now
 
 
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a SQLite file so that several processes on
+    one host draw from the same budget. Every operation runs inside an exclusive
+    SQLite transaction, which serializes the processes through the file lock.
+
+    Parameters:
+        tokens: Capacity of the bucket.
+        fill_rate: Refill rate in tokens/second.
+        path: Path of the SQLite file shared by all processes.
+        name: Name of the bucket inside the file, so one file can hold several buckets.
+    """
+
+    def __init__(self, tokens, fill_rate, path, name="default", activated=True):
+        super().__init__(tokens, fill_rate, activated)
+        self.path = path
+        self.name = name
+        self.timestamp = self._clock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, timestamp REAL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO buckets (name, tokens, timestamp) VALUES (?, ?, ?)",
+                (self.name, self.capacity, self.timestamp),
+            )
+
+    @contextmanager
+    def _state(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._tokens, self.timestamp = self._conn.execute(
+                    "SELECT tokens, timestamp FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                yield
+                self._conn.execute(
+                    "UPDATE buckets SET tokens = ?, timestamp = ? WHERE name = ?",
+                    (self._tokens, self.timestamp, self.name),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _clock(self):
+        # wall clock as the monotonic clock is not comparable between processes on every OS
+        return time.time()
+
+    def close(self):
+        self._conn.close()
+
+
+class RateLimiter:
+    """
+    Enforces a requests-per-minute and a tokens-per-minute budget together.
+
+    Every acquire takes one slot per request plus the given amount of tokens from
+    the matching bucket. Either all buckets are charged or none of them is.
+
+    Parameters:
+        requests_per_minute: Request budget per minute. None disables the dimension.
+        tokens_per_minute: Token budget per minute. None disables the dimension.
+        activated: Set to False to let every acquire pass immediately.
+        shared_path: SQLite file to keep the budgets in, shared by every process using it.
+    """
+
+    def __init__(
+        self, requests_per_minute=None, tokens_per_minute=None, activated=True, shared_path=None
+    ):
+        self.activated = activated
+        self.shared_path = shared_path
+        self.buckets = {}
+        if requests_per_minute:
+            self.buckets["requests"] = self._make_bucket(
+                "requests", requests_per_minute, shared_path
+            )
+        if tokens_per_minute:
+            self.buckets["tokens"] = self._make_bucket("tokens", tokens_per_minute, shared_path)
+
+    @staticmethod
+    def _make_bucket(name, per_minute, shared_path=None):
+        if shared_path:
+            return SharedTokenBucket(per_minute, per_minute / 60, shared_path, name=name)
+        return TokenBucket(per_minute, per_minute / 60)
+
+    def try_acquire(self, tokens=0, requests=1) -> float:
+        """Returns 0 if the budgets were charged, otherwise the seconds to wait before trying again."""
+        if not self.activated:
+            return 0
+
+        amounts = {"requests": requests, "tokens": tokens}
+        charged = []
+        for name, bucket in self.buckets.items():
+            amount = amounts[name]
+            if not amount:
+                continue
+            if amount > bucket.capacity:
+                raise ValueError(
+                    f"Cannot acquire {amount} {name} from a bucket with capacity {bucket.capacity}."
+                )
+            wait = bucket.consume(amount)
+            if wait > 0:
+                # all or nothing: hand back what was already taken
+                for charged_bucket, charged_amount in charged:
+                    charged_bucket.release(charged_amount)
+                return wait
+            charged.append((bucket, amount))
+        return 0
+
+    def acquire(self, tokens=0, requests=1, timeout=None) -> float:
+        """Blocks the calling thread until the budgets allow the call. Returns the time waited."""
+        start = time.monotonic()
+        while True:
+            wait = self.try_acquire(tokens, requests)
+            if wait == 0:
+                return time.monotonic() - start
+            if timeout is not None and time.monotonic() - start + wait > timeout:
+                raise TimeoutError(f"Rate limit not available within {timeout} seconds.")
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=0, requests=1, timeout=None) -> float:
+        """Awaitable version of acquire which yields to the event loop while waiting."""
+        start = time.monotonic()
+        while True:
+            wait = self.try_acquire(tokens, requests)
+            if wait == 0:
+                return time.monotonic() - start
+            if timeout is not None and time.monotonic() - start + wait > timeout:
+                raise TimeoutError(f"Rate limit not available within {timeout} seconds.")
+            await asyncio.sleep(wait)
+
+    def clamp_tokens(self, tokens) -> int:
+        """Caps a token estimate at the capacity of the token bucket, so acquire does not raise."""
+        bucket = self.buckets.get("tokens")
+        if bucket is None:
+            return tokens
+        return min(tokens, int(bucket.capacity))
+
+    def consume(self, requests):
+        """Same contract as TokenBucket.consume so the limiter works with api_rate_limit_wait."""
+        return self.try_acquire(requests=requests)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    RateLimiter that resizes its buckets from the x-ratelimit-* headers the OpenAI API
+    sends with every response. The remaining budget reported by the server replaces the
+    local estimate and the refill rate is spread over the time until the reset, so the
+    limiter slows down before running into 429s and speeds up again when headroom appears.
+
+    Dimensions without a configured budget are created from the first response headers.
+    """
+
+    def update_from_headers(self, headers):
+        """Takes any mapping of response headers, e.g. response.headers of requests or httpx."""
+        if not self.activated or not headers:
+            return
+        headers = {key.lower(): value for key, value in headers.items()}
+
+        for name in ("requests", "tokens"):
+            try:
+                limit = float(headers[f"x-ratelimit-limit-{name}"])
+                remaining = float(headers[f"x-ratelimit-remaining-{name}"])
+            except (KeyError, ValueError):
+                continue
+            reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{name}"))
+
+            if reset and limit > remaining:
+                fill_rate = (limit - remaining) / reset
+            else:
+                fill_rate = limit / 60
+
+            bucket = self.buckets.get(name)
+            if bucket is None:
+                self.buckets[name] = bucket = self._make_bucket(name, limit, self.shared_path)
+            bucket.resize(capacity=limit, tokens=remaining, fill_rate=fill_rate)
+
+
+def parse_reset_duration(value):
+    """Parses reset durations like '1s', '6m0s', '1h2m3.5s' or '20ms' into seconds."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+
 def api_rate_limit_wait(bucket):
     wait_time = bucket.consume(1)  # Consume 1 token for API REQUEST
     if wait_time > 0:
@@ -1,8 +1,10 @@
 from ..utility.logger import get_logger
-from ..utility.decorator import retry
+from ..utility.decorator import retry, circuit_breaker
 from ..utility.helper import log_exception
+from ..utility.httpclient import get_session
+from ..utility.proxypool import ProxyPool, ProxyBannedError, ProxyFailureError
 
-# from selenium import webdriver
+from selenium import webdriver as selenium_webdriver
 from seleniumwire import webdriver
 from seleniumwire.thirdparty.mitmproxy.exceptions import OptionsError
 
@@ -11,9 +13,11 @@ from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.proxy import Proxy, ProxyType
 
-from selenium.common.exceptions import SessionNotCreatedException
+from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from nordvpn_switcher import initialize_VPN, rotate_VPN, terminate_VPN
 
 from urllib.error import URLError
@@ -23,14 +27,60 @@ import time
 import os
 import requests
 import re
+import json
+import tempfile
+import zipfile
+from urllib.parse import urlparse
 
-from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List
 
 import subprocess
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 BROWSER = None
 WAIT = None
+PAGE_LOADS = 0
+
+# wire: proxy, interception and capture through selenium-wire's mitmproxy
+# extension: plain Chrome with native proxy settings and a generated auth extension
+PROXY_MODES = ("wire", "extension")
+
+# normal: wait for the load event, eager: DOMContentLoaded, none: return right away
+PAGE_LOAD_STRATEGIES = ("normal", "eager", "none")
+
+# resource type -> (url path extensions, Accept header prefixes)
+RESOURCE_TYPES = {
+    "image": ((".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico", ".bmp"), ("image/",)),
+    "font": ((".woff", ".woff2", ".ttf", ".otf", ".eot"), ("font/",)),
+    "media": ((".mp4", ".webm", ".mov", ".m4v", ".mp3", ".m4a", ".ogg", ".wav", ".m3u8"), ("video/", "audio/")),
+    "stylesheet": ((".css",), ("text/css",)),
+    "script": ((".js", ".mjs"), ()),
+}
+
+# url patterns of common analytics and ad services, usable as WebConfig.block_url_patterns
+BLOCK_TRACKERS = [
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"googlesyndication\.com",
+    r"doubleclick\.net",
+    r"adservice\.google\.",
+    r"amazon-adsystem\.com",
+    r"facebook\.net",
+    r"connect\.facebook\.com",
+    r"hotjar\.com",
+    r"scorecardresearch\.com",
+    r"taboola\.com",
+    r"outbrain\.com",
+    r"criteo\.com",
+    r"criteo\.net",
+    r"segment\.io",
+    r"segment\.com",
+    r"mixpanel\.com",
+]
 
 
 @dataclass
@@ -42,6 +92,15 @@ class WebConfig:
     remote_env: str = "DOCKER_ENV"
     original_ip: Optional[str] = None
     autoplay_vids: bool = False
+    block_resource_types: Optional[List[str]] = None  # keys of RESOURCE_TYPES
+    block_url_patterns: Optional[List[str]] = None  # regexes, e.g. BLOCK_TRACKERS
+    capture_requests: bool = True  # keep requests in browser.requests
+    request_storage_max_size: Optional[int] = 100  # captured requests kept in memory, None for the unbounded disk storage
+    purge_requests_every: Optional[int] = 20  # clear browser.requests every N page loads
+    proxy_mode: str = "wire"  # one of PROXY_MODES
+    page_load_strategy: str = "normal"  # one of PAGE_LOAD_STRATEGIES, combine eager/none with PageWait
+    page_load_timeout: int = 60
+    startup_delay: float = 0  # seconds to sleep after starting the browser
 
 
 def check_versions_and_paths():
@@ -55,16 +114,33 @@ def check_versions_and_paths():
 
 
 # SELENIUM
-@retry((Exception), "advanced")
 def open_website(
     url,
     browser_config: WebConfig = WebConfig,
     with_proxy: bool = True,
+    proxy_pool: ProxyPool = None,
 ):
+    """
+    Opens url in the shared browser. With a proxy_pool the proxy is switched inside the
+    running browser on errors and bans instead of restarting it, and those proxy errors
+    do not count towards the website's circuit breaker.
+    """
+    if with_proxy and proxy_pool is not None and browser_config.proxy_mode != "wire":
+        raise ValueError("A proxy_pool switches proxies through selenium-wire and needs proxy_mode 'wire'.")
+    return _open_website(url, browser_config, with_proxy, proxy_pool)
+
+
+@retry((Exception), "advanced")
+@circuit_breaker(
+    target=lambda url, *args, **kwargs: f"website:{urlparse(url).netloc}",
+    ignore=(ProxyFailureError,),
+)
+def _open_website(url, browser_config, with_proxy, proxy_pool):
     logger = get_logger()
 
     global BROWSER
     global WAIT
+    global PAGE_LOADS
 
     # BROWSER SETUP
     if not BROWSER:
@@ -80,11 +156,25 @@ def open_website(
             log_exception(e)
             raise  # RETRY
 
+    use_pool = with_proxy and proxy_pool is not None
+    if BROWSER and use_pool and proxy_pool.current(BROWSER) is None:
+        proxy_pool.apply(BROWSER)
+
     if BROWSER:
         # OPENING URL
         try:
             logger.debug(f"Opening URL: {url}")
+            start = time.perf_counter()
             BROWSER.get(url)
+            if use_pool:
+                banned = proxy_pool.looks_banned(BROWSER.title)
+                proxy_pool.record(
+                    proxy_pool.current(BROWSER), latency=time.perf_counter() - start, banned=banned
+                )
+                if banned:
+                    raise ProxyBannedError(f"Proxy {proxy_pool.current(BROWSER)} banned on {url}")
+            PAGE_LOADS += 1
+            purge_requests(BROWSER, browser_config.purge_requests_every, PAGE_LOADS)
         except KeyboardInterrupt:
             quit()
         except Exception as e:
@@ -94,6 +184,17 @@ def open_website(
             else:
                 has_internet = False
 
+            # ROTATING PROXY IN SESSION
+            if use_pool and has_internet:
+                failed_proxy = proxy_pool.current(BROWSER)
+                if not isinstance(e, ProxyBannedError):
+                    proxy_pool.record(failed_proxy, error=True)
+                logger.info("\n|----- R O T A T I N G   P R O X Y -----|\n")
+                proxy_pool.rotate(BROWSER)
+                if isinstance(e, ProxyFailureError):
+                    raise  # RETRY
+                raise ProxyFailureError(f"Proxy {failed_proxy} failed on {url}: {type(e).__name__}") from e
+
             # ROTATING IP
             if with_proxy and has_internet:
                 logger.info("\n|----- R O T A T I N G   IP -----|\n")
@@ -124,6 +225,14 @@ def setup_browser(config: WebConfig, with_proxy: bool = True) -> Tuple[Any, Any]
     proxy_config = config.proxy_config
     remote_env = config.remote_env
     autoplay_videos = config.autoplay_vids
+    proxy_mode = config.proxy_mode
+
+    if proxy_mode not in PROXY_MODES:
+        raise ValueError(f"Unknown proxy_mode '{proxy_mode}'. Choose from {PROXY_MODES}.")
+    if config.page_load_strategy not in PAGE_LOAD_STRATEGIES:
+        raise ValueError(
+            f"Unknown page_load_strategy '{config.page_load_strategy}'. Choose from {PAGE_LOAD_STRATEGIES}."
+        )
 
     # Check for the Docker environment
     in_docker = os.getenv(remote_env) is not None
@@ -131,7 +240,7 @@ def setup_browser(config: WebConfig, with_proxy: bool = True) -> Tuple[Any, Any]
     # Setup for Chrome
     if browser == "chrome":
         options = ChromeOptions()
-        seleniumwire_options = None
+        options.page_load_strategy = config.page_load_strategy
 
         if not autoplay_videos:
             options.add_argument("--autoplay-policy=document-user-activation-required")
@@ -139,7 +248,8 @@ def setup_browser(config: WebConfig, with_proxy: bool = True) -> Tuple[Any, Any]
         if headless or in_docker:
             logger.debug("Running headless...")
             options.add_argument("--disable-gpu")
-            options.add_argument("--headless")
+            # extensions only load in the new headless mode
+            options.add_argument("--headless" if proxy_mode == "wire" else "--headless=new")
             options.add_argument("--no-sandbox")  # Bypass OS-level sandbox
             options.add_argument(
                 "--disable-dev-shm-usage"
@@ -164,9 +274,13 @@ def setup_browser(config: WebConfig, with_proxy: bool = True) -> Tuple[Any, Any]
                 },
             )
 
-        if with_proxy and proxy_config:
-            logger.debug(f"Setting proxy options:\n{proxy_config}")
-            seleniumwire_options = setup_proxy_wire(proxy_config=proxy_config)
+        seleniumwire_options = None
+        extension_path = None
+        if proxy_mode == "wire":
+            seleniumwire_options = setup_capture_wire(config)
+            if with_proxy and proxy_config:
+                logger.debug(f"Setting proxy options:\n{proxy_config}")
+                seleniumwire_options.update(setup_proxy_wire(proxy_config=proxy_config))
 
         if in_docker:
             binary_location = "/usr/bin/chromedriver"
@@ -175,31 +289,305 @@ def setup_browser(config: WebConfig, with_proxy: bool = True) -> Tuple[Any, Any]
             binary_location = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
             service_log_path = None
 
-        logger.debug(f"seleniumwire_options = {seleniumwire_options}")
-        browser_object = webdriver.Chrome(
-            seleniumwire_options=seleniumwire_options,
-            options=options,
-            service=ChromeService(
-                log_path=service_log_path,
-                service_args=["--verbose"],
-                # executable_path=binary_location,
-            ),
+        service = ChromeService(
+            log_path=service_log_path,
+            service_args=["--verbose"],
+            # executable_path=binary_location,
         )
-        time.sleep(3)
-        browser_object.set_page_load_timeout(60)  # SET PAGE LOAD LIMIT
+        if proxy_mode == "wire":
+            logger.debug(f"seleniumwire_options = {seleniumwire_options}")
+            browser_object = webdriver.Chrome(
+                seleniumwire_options=seleniumwire_options, options=options, service=service
+            )
+            interceptor = build_request_interceptor(config.block_resource_types, config.block_url_patterns)
+            if interceptor:
+                browser_object.request_interceptor = interceptor
+        else:
+            try:
+                if with_proxy and proxy_config:
+                    logger.debug(f"Setting proxy extension for {proxy_config.get('host')}")
+                    extension_path = setup_proxy_extension(proxy_config, options)
+                browser_object = selenium_webdriver.Chrome(options=options, service=service)
+            finally:
+                if extension_path:
+                    os.remove(extension_path)  # read into the capabilities, holds the credentials
+            block_urls_cdp(browser_object, config.block_resource_types, config.block_url_patterns)
+        if config.startup_delay:
+            time.sleep(config.startup_delay)
+        browser_object.set_page_load_timeout(config.page_load_timeout)  # SET PAGE LOAD LIMIT
     else:
         raise ValueError(
             f"{browser} browser is not available. Please use Chrome (Firefox is deprecated)."
         )
 
     if browser_object:
-        wait_object = WebDriverWait(browser_object, explicit_wait_seconds)
+        wait_object = PageWait(browser_object, explicit_wait_seconds)
         show_ip = False  # needs to be part of config
         if with_proxy and show_ip:
             logger.info(f"Current IP: {get_current_ip(browser_object)}")
         return browser_object, wait_object
 
 
+class PageWait(WebDriverWait):
+    """
+    WebDriverWait with readiness conditions, so a page only takes as long as the needed
+    content does (most useful with page_load_strategy "eager" or "none").
+
+        browser.get(url)
+        wait.for_selector("div.results")
+        wait.for_network_idle(idle_ms=500)
+
+    Every helper takes an optional timeout overriding the wait's own.
+    """
+
+    def for_selector(
+        self, selector: str, by: str = By.CSS_SELECTOR, visible: bool = False, timeout: float = None
+    ):
+        """Waits until an element matches and returns it."""
+        condition = EC.visibility_of_element_located if visible else EC.presence_of_element_located
+        return self._until(condition((by, selector)), timeout, f"'{selector}' not found")
+
+    def for_ready_state(self, state: str = "complete", timeout: float = None):
+        """Waits until document.readyState is 'interactive' or 'complete'."""
+        accepted = ("interactive", "complete") if state == "interactive" else ("complete",)
+        return self._until(
+            lambda driver: driver.execute_script("return document.readyState") in accepted,
+            timeout,
+            f"document not {state}",
+        )
+
+    def for_network_idle(self, idle_ms: int = 500, timeout: float = None):
+        """
+        Waits until no resource finished loading for idle_ms. A PerformanceObserver counts
+        the resource entries, so the 250 entry default of the timing buffer does not make
+        busy pages look idle. Requests still in flight are not visible to the page.
+        """
+        script = """
+            if (!window.__hhNetwork) {
+                window.__hhNetwork = {count: 0, lastEnd: 0};
+                performance.setResourceTimingBufferSize(100000);
+                new PerformanceObserver(list => {
+                    for (const entry of list.getEntries()) {
+                        window.__hhNetwork.count += 1;
+                        window.__hhNetwork.lastEnd = Math.max(window.__hhNetwork.lastEnd, entry.responseEnd);
+                    }
+                }).observe({type: "resource", buffered: true});
+            }
+            const network = window.__hhNetwork;
+            return [document.readyState, network.count, performance.now() - network.lastEnd];
+        """
+        last_count = None
+
+        def network_idle(driver):
+            nonlocal last_count
+            ready_state, count, idle_for = driver.execute_script(script)
+            idle = ready_state != "loading" and count == last_count and idle_for >= idle_ms
+            last_count = count
+            return idle
+
+        return self._until(network_idle, timeout, f"network not idle for {idle_ms} ms")
+
+    def for_dom_stable(self, stable_ms: int = 500, timeout: float = None):
+        """Waits until the DOM had no mutations (MutationObserver) for stable_ms."""
+        script = """
+            if (!window.__hhLastMutation) {
+                window.__hhLastMutation = performance.now();
+                new MutationObserver(() => { window.__hhLastMutation = performance.now(); }).observe(
+                    document, {childList: true, subtree: true, attributes: true, characterData: true}
+                );
+            }
+            return performance.now() - window.__hhLastMutation;
+        """
+        return self._until(
+            lambda driver: driver.execute_script(script) >= stable_ms,
+            timeout,
+            f"DOM not stable for {stable_ms} ms",
+        )
+
+    def _until(self, condition, timeout=None, message=""):
+        if timeout is None:
+            return self.until(condition, message)
+        wait = WebDriverWait(self._driver, timeout, self._poll, self._ignored_exceptions)
+        return wait.until(condition, message)
+
+
+# BROWSER POOL
+@dataclass
+class BrowserSession:
+    browser: Any
+    wait: Any
+    uses: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class BrowserPool:
+    """
+    Keeps up to 'size' warm browser sessions created by setup_browser so that scraping
+    can run in parallel threads and one broken session does not stop the others.
+
+    Sessions are health-checked on checkout and replaced after max_uses page loads or
+    when they were checked in as failed.
+
+        with BrowserPool(config, size=4) as pool:
+            titles = pool.map(urls, lambda browser, wait: browser.title)
+    """
+
+    def __init__(
+        self,
+        config: WebConfig = WebConfig(),
+        size: int = 2,
+        with_proxy: bool = True,
+        max_uses: int = 50,
+        health_check: bool = True,
+        warm: bool = True,
+    ):
+        self.config = config
+        self.size = size
+        self.with_proxy = with_proxy
+        self.max_uses = max_uses
+        self.health_check = health_check
+        self._idle = deque()
+        self._created = 0
+        self._closed = False
+        # guards _idle and _created, notified whenever a session or a free slot appears
+        self._cond = threading.Condition()
+
+        if warm:
+            while self._reserve():
+                self._release(self._create())
+
+    def checkout(self, timeout: float = None) -> BrowserSession:
+        """Returns a healthy session, creating one while below size or waiting for a free one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            session = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("BrowserPool is closed.")
+                    if self._idle:
+                        session = self._idle.popleft()
+                        break
+                    if self._created < self.size:
+                        self._created += 1  # reserved, created outside the lock
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No browser session available within {timeout} seconds.")
+                    self._cond.wait(remaining)
+
+            if session is None:
+                session = self._create()
+
+            if self._is_usable(session):
+                session.uses += 1
+                return session
+            self._discard(session)
+
+    def checkin(self, session: BrowserSession, failed: bool = False):
+        """Returns the session to the pool, or quits it if it failed or is used up."""
+        if failed or self._closed or session.uses >= self.max_uses:
+            self._discard(session)
+        else:
+            self._release(session)
+
+    @contextmanager
+    def session(self, timeout: float = None):
+        """
+        Checks a session out for the block. Errors of the caller's own code (parsing, ...)
+        return the session to the pool, only WebDriver errors or a failed health check
+        replace it.
+        """
+        session = self.checkout(timeout)
+        try:
+            yield session
+        except BaseException as e:
+            failed = isinstance(e, WebDriverException) or not self._is_usable(session)
+            self.checkin(session, failed=failed)
+            raise
+        self.checkin(session)
+
+    def map(self, urls, fn, max_workers: int = None) -> list:
+        """
+        Opens every url in a pooled session and returns fn(browser, wait) per url, in order.
+        Failed urls are logged and return None.
+        """
+
+        def extract(url):
+            try:
+                with self.session() as session:
+                    session.browser.get(url)
+                    purge_requests(session.browser, self.config.purge_requests_every, session.uses)
+                    return fn(session.browser, session.wait)
+            except Exception as e:
+                log_exception(e)
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.size) as executor:
+            return list(executor.map(extract, urls))
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            sessions = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for session in sessions:
+            self._discard(session)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _create(self) -> BrowserSession:
+        logger = get_logger()
+        logger.debug("Starting pooled browser session...")
+        try:
+            browser, wait = setup_browser(self.config, self.with_proxy)
+        except BaseException:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+        return BrowserSession(browser, wait)
+
+    def _release(self, session: BrowserSession):
+        with self._cond:
+            if not self._closed:
+                self._idle.append(session)
+                self._cond.notify()
+                return
+        self._discard(session)
+
+    def _reserve(self) -> bool:
+        with self._cond:
+            if self._created < self.size:
+                self._created += 1
+                return True
+            return False
+
+    def _is_usable(self, session: BrowserSession) -> bool:
+        if session.uses >= self.max_uses:
+            return False
+        if not self.health_check:
+            return True
+        try:
+            return session.browser.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _discard(self, session: BrowserSession):
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()  # a waiting checkout may create a replacement
+        try:
+            session.browser.quit()
+        except Exception:
+            pass
+
+
 # chrome
 def setup_proxy_wire(
     proxy_config: dict = {"host": None, "username": None, "password": None},
@@ -222,6 +610,144 @@ def setup_proxy_wire(
     return proxy
 
 
+def setup_proxy_extension(proxy_config: dict, options: ChromeOptions):
+    """
+    Configures the proxy natively in Chrome, without selenium-wire. Proxies with
+    credentials get a generated Manifest V3 extension answering the auth challenge,
+    its zip path is returned and can be removed once the driver started.
+    """
+    host = proxy_config.get("host")
+    username = proxy_config.get("username")
+    password = proxy_config.get("password")
+    if not host:
+        raise ValueError("The proxy host must be provided.")
+
+    if not username:
+        options.add_argument(f"--proxy-server=http://{host}")
+        return None
+
+    hostname, _, port = host.rpartition(":")
+    if not hostname or not port.isdigit():
+        raise ValueError(f"Proxy host '{host}' must be given as host:port.")
+
+    manifest = {
+        "manifest_version": 3,
+        "name": "helpinghands proxy",
+        "version": "1.0",
+        "permissions": ["proxy", "webRequest", "webRequestAuthProvider"],
+        "host_permissions": ["<all_urls>"],
+        "background": {"service_worker": "background.js"},
+    }
+    proxy_settings = {
+        "mode": "fixed_servers",
+        "rules": {
+            "singleProxy": {"scheme": "http", "host": hostname, "port": int(port)},
+            "bypassList": ["localhost", "127.0.0.1"],
+        },
+    }
+    credentials = {"username": username, "password": password or ""}
+    background_js = (
+        f"chrome.proxy.settings.set({{value: {json.dumps(proxy_settings)}, scope: 'regular'}});\n"
+        "chrome.webRequest.onAuthRequired.addListener(\n"
+        f"  (details, callback) => callback({{authCredentials: {json.dumps(credentials)}}}),\n"
+        "  {urls: ['<all_urls>']},\n"
+        "  ['asyncBlocking']\n"
+        ");\n"
+    )
+
+    file_descriptor, extension_path = tempfile.mkstemp(prefix="helpinghands_proxy_", suffix=".zip")
+    try:
+        with os.fdopen(file_descriptor, "wb") as f, zipfile.ZipFile(f, "w") as extension:
+            extension.writestr("manifest.json", json.dumps(manifest))
+            extension.writestr("background.js", background_js)
+        options.add_extension(extension_path)
+    except BaseException:
+        os.remove(extension_path)  # holds the credentials
+        raise
+    return extension_path
+
+
+# REQUEST BLOCKING
+def setup_capture_wire(config: WebConfig) -> dict:
+    """
+    Returns the seleniumwire_options limiting how many requests are kept in memory.
+    Without capture and blocking nothing is intercepted at all, with blocking the
+    interceptor still runs but nothing is stored.
+    """
+    blocking = bool(config.block_resource_types or config.block_url_patterns)
+    if not config.capture_requests and not blocking:
+        return {"disable_capture": True}
+    if not config.capture_requests:
+        return {"request_storage": "memory", "request_storage_max_size": 0}
+    if config.request_storage_max_size is not None:
+        return {"request_storage": "memory", "request_storage_max_size": config.request_storage_max_size}
+    return {}
+
+
+def build_request_interceptor(block_resource_types: list = None, block_url_patterns: list = None):
+    """
+    Returns a selenium-wire request interceptor aborting requests of the given resource
+    types (see RESOURCE_TYPES) or with urls matching one of the regex patterns, or None
+    if there is nothing to block.
+    """
+    block_resource_types = block_resource_types or []
+    unknown = set(block_resource_types) - set(RESOURCE_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown resource types {sorted(unknown)}. Choose from {list(RESOURCE_TYPES)}.")
+    if not block_resource_types and not block_url_patterns:
+        return None
+
+    extensions = tuple(ext for name in block_resource_types for ext in RESOURCE_TYPES[name][0])
+    accept_prefixes = tuple(prefix for name in block_resource_types for prefix in RESOURCE_TYPES[name][1])
+    pattern = re.compile("|".join(f"(?:{p})" for p in block_url_patterns)) if block_url_patterns else None
+
+    def interceptor(request):
+        path = urlparse(request.url).path.lower()
+        accept = request.headers.get("Accept") or ""
+        if (
+            (extensions and path.endswith(extensions))
+            or (accept_prefixes and accept.startswith(accept_prefixes))
+            or (pattern and pattern.search(request.url))
+        ):
+            request.abort()
+
+    return interceptor
+
+
+def block_urls_cdp(browser, block_resource_types: list = None, block_url_patterns: list = None):
+    """
+    Blocks requests in a browser without selenium-wire through the DevTools protocol.
+    CDP only takes wildcard patterns, so regexes beyond plain escaped host names are
+    skipped with a warning.
+    """
+    logger = get_logger()
+    unknown = set(block_resource_types or []) - set(RESOURCE_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown resource types {sorted(unknown)}. Choose from {list(RESOURCE_TYPES)}.")
+
+    urls = []
+    for name in block_resource_types or []:
+        for extension in RESOURCE_TYPES[name][0]:
+            urls += [f"*{extension}", f"*{extension}?*"]
+    for pattern in block_url_patterns or []:
+        wildcard = pattern.replace("\\.", ".")
+        if re.search(r"[\\()\[\]{}|?+*^$]", wildcard):
+            logger.warning(f"Cannot block '{pattern}' via CDP, use plain host names.")
+            continue
+        urls.append(f"*{wildcard}*")
+
+    if urls:
+        browser.execute_cdp_cmd("Network.enable", {})
+        browser.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+    return urls
+
+
+def purge_requests(browser, every: int, page_loads: int):
+    """Clears the requests captured by selenium-wire every N page loads."""
+    if every and page_loads % every == 0 and hasattr(browser, "requests"):
+        del browser.requests
+
+
 # PROXY
 # firefox (deprecated)
 def setup_proxy_simple(host: str, username: str, password: str) -> Proxy:
@@ -250,7 +776,7 @@ def test_proxy(proxy_host, proxy_user, proxy_pass):
     }
     url = "https://lumtest.com/myip.json"
     try:
-        response = requests.get(url, proxies=proxies, timeout=10)
+        response = get_session(proxies).get(url, timeout=10)
         response.raise_for_status()  # This will raise an HTTPError if the HTTP request returned an unsuccessful status code
 
         data = response.json()
@@ -273,7 +799,7 @@ def listen_on_port(address="0.0.0.0", port=8080):
 def get_original_ip():
     logger = get_logger()
     try:
-        response = requests.get("https://api.ipify.org?format=json")
+        response = get_session().get("https://api.ipify.org?format=json")
         ip = response.json()["ip"]
         return ip
     except Exception as e:
@@ -348,7 +874,12 @@ def rotate_ip(browser_object, config: WebConfig):
 
 
 # BEAUTIFUL SOUP
-def make_soup(browser, new_soup=True, do_print=True):
+def make_soup(browser, new_soup=True, do_print=True, parser="html.parser", parse_only=None):
+    """
+    Parses browser.page_source. Pass parser="lxml" for faster parsing and parse_only
+    (a SoupStrainer, tag name or list of tag names) to only build the needed part.
+    For a single section of the page make_partial_soup avoids shipping the full source.
+    """
     logger = get_logger()
     fresh_soup = "Making Soup..."
     old_soup = "Refreshing Soup..."
@@ -364,7 +895,115 @@ def make_soup(browser, new_soup=True, do_print=True):
         elif do_print:
             print(old_soup)
 
-    return BeautifulSoup(browser.page_source, "html.parser")
+    return BeautifulSoup(browser.page_source, parser, parse_only=_strainer(parse_only))
+
+
+def make_partial_soup(browser, selector: str, parser="lxml", parse_only=None):
+    """Parses only the outerHTML of the elements matching the CSS selector."""
+    html = browser.execute_script(
+        "return Array.from(document.querySelectorAll(arguments[0]), e => e.outerHTML).join('');",
+        selector,
+    )
+    return BeautifulSoup(html or "", parser, parse_only=_strainer(parse_only))
+
+
+def _strainer(parse_only):
+    if parse_only is None or isinstance(parse_only, SoupStrainer):
+        return parse_only
+    return SoupStrainer(parse_only)
+
+
+# EXTRACTION
+_EXTRACT_JS = """
+const spec = JSON.parse(arguments[0]);
+const scope = arguments[1] ? document.querySelector(arguments[1]) : document;
+
+function find(context, field) {
+    if (field.xpath) {
+        const doc = context.ownerDocument || context;
+        const result = doc.evaluate(field.xpath, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < result.snapshotLength && (field.all || i < 1); i++) {
+            nodes.push(result.snapshotItem(i));
+        }
+        return nodes;
+    }
+    if (field.all) {
+        return Array.from(context.querySelectorAll(field.selector));
+    }
+    const node = context.querySelector(field.selector);
+    return node ? [node] : [];
+}
+
+function value(node, field) {
+    if (field.fields) {
+        return run(node, field.fields);
+    }
+    const attr = field.attr || "text";
+    if (attr === "text") {
+        return (node.textContent || "").replace(/\\s+/g, " ").trim();
+    }
+    if (attr === "html") {
+        return node.outerHTML;
+    }
+    const property = node[attr];  // properties resolve urls, e.g. href and src
+    if (property !== undefined && property !== null && typeof property !== "object" && typeof property !== "function") {
+        return property;
+    }
+    return node.getAttribute ? node.getAttribute(attr) : null;
+}
+
+function run(context, fields) {
+    const output = {};
+    for (const [name, field] of Object.entries(fields)) {
+        const values = find(context, field).map(node => value(node, field));
+        output[name] = field.all ? values : (values.length ? values[0] : null);
+    }
+    return output;
+}
+
+return scope ? JSON.stringify(run(scope, spec)) : null;
+"""
+
+
+def extract(browser, spec: dict, root: str = None) -> Optional[dict]:
+    """
+    Extracts fields inside the page via execute_script and returns only the resulting
+    JSON, instead of transferring and parsing the full page_source.
+
+    Parameters:
+        browser: The WebDriver.
+        spec: Mapping of field name to a CSS selector string or a dict with
+            'selector' or 'xpath', 'attr' ("text" (default), "html" or any attribute or
+            property like "href"), 'all' (list of every match instead of the first) and
+            'fields' (nested spec evaluated relative to each match).
+        root: Optional CSS selector limiting the extraction to one element.
+
+    Returns:
+        Dict of field values (None or [] when nothing matched), or None if root is missing.
+
+        extract(browser, {
+            "title": "h1",
+            "items": {"selector": "li.product", "all": True, "fields": {
+                "name": ".name",
+                "url": {"selector": "a", "attr": "href"},
+            }},
+        })
+    """
+    result = browser.execute_script(_EXTRACT_JS, json.dumps(_normalize_spec(spec)), root)
+    return json.loads(result) if result else None
+
+
+def _normalize_spec(spec: dict) -> dict:
+    normalized = {}
+    for name, field_spec in spec.items():
+        field_spec = {"selector": field_spec} if isinstance(field_spec, str) else dict(field_spec)
+        if not field_spec.get("selector") and not field_spec.get("xpath"):
+            raise ValueError(f"Field '{name}' needs a 'selector' or an 'xpath'.")
+        if "fields" in field_spec:
+            field_spec["fields"] = _normalize_spec(field_spec["fields"])
+        normalized[name] = field_spec
+    return normalized
 
 
 # VPN
@@ -440,7 +1079,7 @@ def disconnect_from_vpn(vpn_settings):
 
 def check_internet(website: str = "https://www.duckduckgo.com"):
     try:
-        response = requests.get(website)
+        response = get_session().get(website)
         return True if response.status_code == 200 else False
     except requests.RequestException:
         return False
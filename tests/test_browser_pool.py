@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+web = pytest.importorskip("helpinghands.utility.web")
+from selenium.common.exceptions import WebDriverException
+
+
+class FakeBrowser:
+    def get(self, url):
+        pass
+
+    def execute_script(self, script):
+        return 1
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def pool_factory(monkeypatch):
+    created = []
+
+    def setup_browser(config, with_proxy=True):
+        created.append(FakeBrowser())
+        return created[-1], None
+
+    monkeypatch.setattr(web, "setup_browser", setup_browser)
+    pools = []
+
+    def factory(**kwargs):
+        pool = web.BrowserPool(web.WebConfig(), with_proxy=False, **kwargs)
+        pool.created = created
+        pools.append(pool)
+        return pool
+
+    yield factory
+    for pool in pools:
+        pool.close()
+
+
+def test_map_with_failing_sessions_does_not_hang(pool_factory):
+    pool = pool_factory(size=2)
+
+    def failing(browser, wait):
+        time.sleep(0.05)  # keeps the other workers waiting for a session
+        raise WebDriverException("browser crashed")
+
+    result = []
+    worker = threading.Thread(
+        target=lambda: result.append(pool.map(range(20), failing, max_workers=4)), daemon=True
+    )
+    worker.start()
+    worker.join(timeout=10)
+
+    assert not worker.is_alive(), "BrowserPool.map hung after discarded sessions"
+    assert result == [[None] * 20]
+
+
+def test_errors_in_fn_keep_healthy_sessions(pool_factory):
+    pool = pool_factory(size=2)
+
+    def unparsable(browser, wait):
+        raise ValueError("broken page")
+
+    assert pool.map(range(10), unparsable) == [None] * 10
+    assert len(pool.created) == 2
+
+
+def test_discard_wakes_waiting_checkout(pool_factory):
+    pool = pool_factory(size=1)
+    session = pool.checkout()
+    checked_out = []
+    waiter = threading.Thread(target=lambda: checked_out.append(pool.checkout(timeout=5)), daemon=True)
+    waiter.start()
+
+    pool.checkin(session, failed=True)
+    waiter.join(timeout=5)
+
+    assert checked_out and checked_out[0] is not session
+
+
+def test_checkout_times_out_when_exhausted(pool_factory):
+    pool = pool_factory(size=1)
+    pool.checkout()
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.1)
@@ -0,0 +1,72 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from helpinghands.utility.tokenbucket import AdaptiveRateLimiter, SharedTokenBucket, TokenBucket
+
+
+RATE_LIMIT_HEADERS = {
+    "x-ratelimit-limit-requests": "500",
+    "x-ratelimit-remaining-requests": "499",
+    "x-ratelimit-reset-requests": "120ms",
+    "x-ratelimit-limit-tokens": "30000",
+    "x-ratelimit-remaining-tokens": "29000",
+    "x-ratelimit-reset-tokens": "2s",
+}
+
+
+class RateLimitHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        for name, value in RATE_LIMIT_HEADERS.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RateLimitHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_update_from_headers_resizes_buckets(server_url):
+    limiter = AdaptiveRateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    limiter.update_from_headers(requests.get(server_url, timeout=5).headers)
+
+    requests_bucket = limiter.buckets["requests"]
+    tokens_bucket = limiter.buckets["tokens"]
+    assert requests_bucket.capacity == 500
+    assert requests_bucket.fill_rate == pytest.approx(1 / 0.12)
+    assert tokens_bucket.capacity == 30000
+    assert tokens_bucket.fill_rate == pytest.approx(500)
+    assert 29000 <= tokens_bucket._tokens < 30000
+
+
+def test_update_from_headers_creates_shared_buckets(server_url, tmp_path):
+    shared_path = str(tmp_path / "budget.db")
+    limiter = AdaptiveRateLimiter(shared_path=shared_path)
+    limiter.update_from_headers(requests.get(server_url, timeout=5).headers)
+
+    assert isinstance(limiter.buckets["tokens"], SharedTokenBucket)
+    other = SharedTokenBucket(1, 1, shared_path, name="tokens")
+    with other._state():
+        assert 29000 <= other._tokens < 30000
+    for bucket in (*limiter.buckets.values(), other):
+        bucket.close()
+
+
+def test_clamp_tokens_keeps_large_estimates_acquirable():
+    limiter = AdaptiveRateLimiter(tokens_per_minute=1000)
+    assert limiter.clamp_tokens(5000) == 1000
+    assert limiter.acquire(tokens=limiter.clamp_tokens(5000), timeout=1) >= 0
+    assert isinstance(limiter.buckets["tokens"], TokenBucket)